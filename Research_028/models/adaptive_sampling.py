@@ -0,0 +1,255 @@
+import io
+import os
+from collections import Counter, namedtuple
+import numpy as np
+from emotion_recognition import N_FEATURES
+from video_spliter import VideoFrames, count_frames, iter_frames_from_bytes
+
+# Result of landmark extraction over a video.
+#   features          (n_rows, N_FEATURES) float32, one row per frame sent to the classifier
+#   vote_slots        slot (frame on the output timeline) each vote belongs to
+#   vote_rows         feature row whose prediction the vote reuses
+#   n_slots           frames on the output timeline, i.e. duration * fps
+#   frames_decoded    frames decoded from the video
+#   frames_landmarked frames that went through FaceMesh
+LandmarkTrack = namedtuple(
+    'LandmarkTrack',
+    ['features', 'vote_slots', 'vote_rows', 'n_slots', 'frames_decoded', 'frames_landmarked']
+)
+
+
+class AdaptiveSampler:
+    def __init__(self, pixel_threshold=None, landmark_threshold=None, burst_threshold=None,
+                 boost=1, burst_frames=10, thumb_width=64):
+        """Decide which decoded frames need FaceMesh and the classifier.
+
+        Frames are decoded at `boost` times the output fps. Normally only the
+        first decoded frame of every output slot is examined; after a fast
+        expression change every decoded frame is examined for `burst_frames`
+        frames and the slot takes the majority label of its frames.
+
+        A frame whose downsampled grayscale image differs from the last
+        examined frame by less than `pixel_threshold` (mean absolute 0-255
+        difference) skips FaceMesh and reuses the previous prediction. A frame
+        whose landmarks moved less than `landmark_threshold` (mean absolute
+        difference of normalized coordinates) reuses the previous prediction
+        instead of being classified again. A landmark change above
+        `burst_threshold` starts a burst. Thresholds left as None disable the
+        corresponding check.
+
+        Args:
+            pixel_threshold (float): Pixel delta below which FaceMesh is skipped
+            landmark_threshold (float): Landmark delta below which the classifier is skipped
+            burst_threshold (float): Landmark delta above which the sampling rate is raised
+            boost (int): Decoding rate as a multiple of the output fps
+            burst_frames (int): Decoded frames examined at the raised rate after a change
+            thumb_width (int): Approximate width of the image used for the pixel delta
+        """
+        self.pixel_threshold = pixel_threshold
+        self.landmark_threshold = landmark_threshold
+        self.burst_threshold = burst_threshold
+        self.boost = max(int(boost), 1)
+        self.burst_frames = burst_frames
+        self.thumb_width = thumb_width
+
+    @classmethod
+    def fixed(cls):
+        """Sampler that examines and classifies every frame, i.e. plain fixed-rate sampling."""
+        return cls()
+
+    @classmethod
+    def from_env(cls):
+        """Adaptive sampler configured from EMOTION_* variables if EMOTION_ADAPTIVE=1, fixed sampling otherwise."""
+        if os.getenv('EMOTION_ADAPTIVE', '0') != '1':
+            return cls.fixed()
+        return cls(
+            pixel_threshold=float(os.getenv('EMOTION_PIXEL_THRESHOLD', '1.5')),
+            landmark_threshold=float(os.getenv('EMOTION_LANDMARK_THRESHOLD', '0.002')),
+            burst_threshold=float(os.getenv('EMOTION_BURST_THRESHOLD', '0.01')),
+            boost=int(os.getenv('EMOTION_BOOST', '2')),
+        )
+
+    def cache_key(self):
+        """Identifies the sampling policy, since it changes which frames get landmarks."""
+        return (f"px={self.pixel_threshold}|lm={self.landmark_threshold}|burst={self.burst_threshold}"
+                f"|boost={self.boost}|burst_frames={self.burst_frames}|thumb={self.thumb_width}")
+
+    def decode_fps(self, fps):
+        return fps * self.boost
+
+    def _thumbnail(self, frame):
+        step = max(frame.shape[1] // self.thumb_width, 1)
+        return frame[::step, ::step].mean(axis=2, dtype=np.float32)
+
+    def run(self, frames, extract, n_slots, slot_offset=0, capacity=None, progress=None):
+        """Sample decoded frames and extract landmarks where needed.
+
+        Args:
+            frames (iterable): Frames decoded at `decode_fps`, starting at slot `slot_offset`
+            extract (Callable): extract(frame, out) -> bool, writes landmarks into `out`
+            n_slots (int): Total number of output slots in the video, None if not known up front
+            slot_offset (int): Slot of the first frame, for chunks of a longer video
+            capacity (int, optional): Expected number of rows, to preallocate the matrix
+            progress (Callable, optional): Called as progress(slots_done) once per output slot
+
+        Returns:
+            LandmarkTrack: Votes use slots relative to the whole video
+        """
+        features = np.zeros((max(capacity or 64, 1), N_FEATURES), dtype=np.float32)
+        n_rows = 0
+        vote_slots, vote_rows = [], []
+        last_thumb = None
+        last_row = -1
+        burst_left = 0
+        decoded = landmarked = 0
+
+        for index, frame in enumerate(frames):
+            decoded += 1
+            slot = slot_offset + index // self.boost
+            if n_slots is not None:
+                slot = min(slot, n_slots - 1)
+            if progress is not None and index % self.boost == 0:
+                progress(slot - slot_offset + 1)
+            if index % self.boost and burst_left <= 0:
+                continue
+            burst_left -= 1
+
+            if self.pixel_threshold is not None:
+                thumb = self._thumbnail(frame)
+                if last_thumb is not None and np.abs(thumb - last_thumb).mean() < self.pixel_threshold:
+                    if last_row >= 0:
+                        vote_slots.append(slot)
+                        vote_rows.append(last_row)
+                    continue
+                last_thumb = thumb
+
+            if n_rows == len(features):
+                features = np.concatenate([features, np.zeros_like(features)])
+            landmarked += 1
+            try:
+                found = extract(frame, features[n_rows])
+            except Exception as e:
+                print(f"Error during landmark extraction: {str(e)}")
+                found = False
+            if not found:
+                last_row = -1
+                continue
+
+            change = np.abs(features[n_rows] - features[last_row]).mean() if last_row >= 0 else None
+            if self.landmark_threshold is not None and change is not None and change < self.landmark_threshold:
+                vote_slots.append(slot)
+                vote_rows.append(last_row)
+                continue
+
+            last_row = n_rows
+            n_rows += 1
+            vote_slots.append(slot)
+            vote_rows.append(last_row)
+            if self.burst_threshold is not None and change is not None and change > self.burst_threshold:
+                burst_left = self.burst_frames
+
+        if n_slots is None:
+            n_slots = slot_offset + -(-decoded // self.boost)
+        return LandmarkTrack(
+            features=features[:n_rows],
+            vote_slots=np.array(vote_slots, dtype=np.int64),
+            vote_rows=np.array(vote_rows, dtype=np.int64),
+            n_slots=n_slots,
+            frames_decoded=decoded,
+            frames_landmarked=landmarked,
+        )
+
+
+def extract_track(video_path, fps, sampler, extract, progress=None):
+    """Run `sampler` over a whole video in the current process.
+
+    Args:
+        video_path (str): Path to the video file
+        fps (float): Output frames per second
+        sampler (AdaptiveSampler): Sampling policy
+        extract (Callable): extract(frame, out) -> bool, e.g. EmotionPredictor.extract_landmark_vector
+        progress (Callable, optional): Called as progress(frames_done, frames_total)
+
+    Returns:
+        LandmarkTrack
+    """
+    frames = VideoFrames(video_path, fps=sampler.decode_fps(fps))
+    n_slots = count_frames(frames.video.duration, fps)
+    report = (lambda done: progress(done, n_slots)) if progress else None
+    return sampler.run(frames, extract, n_slots, capacity=n_slots, progress=report)
+
+
+def extract_track_from_stream(chunks, fps, sampler, extract, progress=None):
+    """Like `extract_track`, but decodes video bytes while they are still arriving.
+
+    Args:
+        chunks (iterable): Video bytes in order, e.g. `ProgressiveDownload.iter_bytes()`
+        fps (float): Output frames per second
+        sampler (AdaptiveSampler): Sampling policy
+        extract (Callable): extract(frame, out) -> bool
+        progress (Callable, optional): Called as progress(frames_done, None), the total is unknown
+
+    Returns:
+        LandmarkTrack
+    """
+    frames = iter_frames_from_bytes(chunks, sampler.decode_fps(fps))
+    report = (lambda done: progress(done, None)) if progress else None
+    return sampler.run(frames, extract, None, progress=report)
+
+
+def merge_tracks(tracks, n_slots):
+    """Concatenate the tracks of consecutive chunks of one video."""
+    offsets = np.cumsum([0] + [len(track.features) for track in tracks[:-1]])
+    return LandmarkTrack(
+        features=np.concatenate([track.features for track in tracks]) if tracks else np.zeros((0, N_FEATURES), dtype=np.float32),
+        vote_slots=np.concatenate([track.vote_slots for track in tracks]) if tracks else np.zeros(0, dtype=np.int64),
+        vote_rows=np.concatenate([track.vote_rows + offset for track, offset in zip(tracks, offsets)]) if tracks else np.zeros(0, dtype=np.int64),
+        n_slots=n_slots,
+        frames_decoded=sum(track.frames_decoded for track in tracks),
+        frames_landmarked=sum(track.frames_landmarked for track in tracks),
+    )
+
+
+def slot_labels(track, row_labels):
+    """Label of every output slot (majority of its votes, None if no face was seen).
+
+    Args:
+        track (LandmarkTrack): Extraction result
+        row_labels (numpy.ndarray): Classifier label of every feature row
+    """
+    votes = [Counter() for _ in range(track.n_slots)]
+    for slot, row in zip(track.vote_slots, track.vote_rows):
+        votes[slot][row_labels[row]] += 1
+    return [counter.most_common(1)[0][0] if counter else None for counter in votes]
+
+
+def count_emotions(track, row_labels):
+    """Number of output slots per predicted emotion."""
+    counts = Counter(label for label in slot_labels(track, row_labels) if label is not None)
+    return {str(emotion): int(count) for emotion, count in counts.most_common()}
+
+
+def track_to_bytes(track):
+    """Serialize a LandmarkTrack (compressed npz)."""
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        features=track.features,
+        vote_slots=track.vote_slots,
+        vote_rows=track.vote_rows,
+        counters=np.array([track.n_slots, track.frames_decoded, track.frames_landmarked], dtype=np.int64),
+    )
+    return buffer.getvalue()
+
+
+def track_from_bytes(data):
+    with np.load(io.BytesIO(data)) as arrays:
+        n_slots, frames_decoded, frames_landmarked = (int(value) for value in arrays['counters'])
+        return LandmarkTrack(
+            features=arrays['features'],
+            vote_slots=arrays['vote_slots'],
+            vote_rows=arrays['vote_rows'],
+            n_slots=n_slots,
+            frames_decoded=frames_decoded,
+            frames_landmarked=frames_landmarked,
+        )
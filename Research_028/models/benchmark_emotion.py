@@ -0,0 +1,77 @@
+"""
+Accuracy versus speed of adaptive frame sampling for emotion detection.
+
+Runs fixed-rate sampling (every frame) as the reference and the adaptive
+sampler at one or more pixel thresholds on the same local video, then
+reports time, frames sent through FaceMesh / the classifier, per-frame
+label agreement with the reference and the difference in emotion shares.
+
+    python benchmark_emotion.py "Man laughing [FREE STOCK FOOTAGE].mp4" --pixel-thresholds 0.5 1.5 3
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+from adaptive_sampling import AdaptiveSampler, count_emotions, extract_track, slot_labels
+from emotion_recognition import get_emotion_predictor
+
+DEFAULT_VIDEO = os.path.join(Path(__file__).parent, "Man laughing [FREE STOCK FOOTAGE].mp4")
+
+
+def run(video_path, fps, sampler, predictor):
+    start = time.perf_counter()
+    track = extract_track(video_path, fps, sampler, predictor.extract_landmark_vector)
+    row_labels, _ = predictor.classify(track.features)
+    elapsed = time.perf_counter() - start
+    return track, row_labels, elapsed
+
+
+def _shares(counts):
+    total = sum(counts.values()) or 1
+    return {emotion: count / total for emotion, count in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", nargs="?", default=DEFAULT_VIDEO)
+    parser.add_argument("--fps", type=float, default=10)
+    parser.add_argument("--pixel-thresholds", type=float, nargs="+", default=[0.5, 1.5, 3.0])
+    parser.add_argument("--landmark-threshold", type=float, default=0.002)
+    parser.add_argument("--burst-threshold", type=float, default=0.01)
+    parser.add_argument("--boost", type=int, default=2)
+    args = parser.parse_args()
+
+    predictor = get_emotion_predictor()
+    # Warm the FaceMesh pool so the first run is not penalised
+    run(args.video, args.fps, AdaptiveSampler.fixed(), predictor)
+
+    ref_track, ref_rows, ref_time = run(args.video, args.fps, AdaptiveSampler.fixed(), predictor)
+    ref_labels = slot_labels(ref_track, ref_rows)
+    ref_shares = _shares(count_emotions(ref_track, ref_rows))
+
+    header = f"{'sampler':<22}{'time s':>8}{'speedup':>9}{'facemesh':>10}{'classified':>12}{'agree':>8}{'share diff':>12}"
+    print(f"{args.video}: {ref_track.n_slots} frames at {args.fps} fps")
+    print(header)
+    print("-" * len(header))
+    print(f"{'fixed':<22}{ref_time:>8.2f}{1:>8.2f}x{ref_track.frames_landmarked:>10}{len(ref_rows):>12}{1:>8.0%}{0:>12.3f}")
+
+    for pixel_threshold in args.pixel_thresholds:
+        sampler = AdaptiveSampler(
+            pixel_threshold=pixel_threshold,
+            landmark_threshold=args.landmark_threshold,
+            burst_threshold=args.burst_threshold,
+            boost=args.boost,
+        )
+        track, rows, elapsed = run(args.video, args.fps, sampler, predictor)
+        labels = slot_labels(track, rows)
+        agree = sum(a == b for a, b in zip(labels, ref_labels)) / max(len(ref_labels), 1)
+        shares = _shares(count_emotions(track, rows))
+        share_diff = sum(abs(shares.get(e, 0) - ref_shares.get(e, 0)) for e in set(shares) | set(ref_shares)) / 2
+        print(
+            f"{f'adaptive px<{pixel_threshold:g}':<22}{elapsed:>8.2f}{ref_time / elapsed:>8.2f}x"
+            f"{track.frames_landmarked:>10}{len(rows):>12}{agree:>8.0%}{share_diff:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
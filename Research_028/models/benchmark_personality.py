@@ -0,0 +1,141 @@
+"""
+Parity check and benchmark for the BERT inference backends.
+
+Every backend is loaded in a fresh process so its RSS is measured in isolation.
+CLS embeddings and classifier probabilities are compared against fp32 torch.
+
+    python benchmark_personality.py --backends torch torch-int8 onnx onnx-int8 --texts sample.txt
+"""
+import argparse
+import multiprocessing as mp
+import os
+import queue as queue_module
+import time
+import numpy as np
+
+SAMPLE_TEXTS = [
+    "I love meeting new people and leading the team during sprint planning.",
+    "I prefer working alone on hard algorithmic problems late at night.",
+    "Deadlines stress me out, so I plan every task carefully in advance.",
+    "I enjoy trying new frameworks even when the old one still works fine.",
+    "Helping colleagues debug their code is the best part of my day.",
+    "I get bored quickly with repetitive maintenance work.",
+    "Clear documentation and tidy code matter more to me than speed.",
+    "I speak up in meetings whenever I disagree with a design decision.",
+]
+
+
+def _run_backend(backend, texts, batch_size, repeats, queue):
+    # Imported here so each child process starts from a clean slate
+    import torch
+    from transformers import AutoTokenizer
+    from bert_backends import load_bert
+    from model_registry import _rss_bytes
+    from personality_prediction import BERT_MODEL_NAME, MODEL_DIR, get_bert_embeddings
+
+    torch.set_num_threads(int(os.getenv("BENCH_THREADS", torch.get_num_threads())))
+    tokenizer = AutoTokenizer.from_pretrained(BERT_MODEL_NAME)
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    model = load_bert(backend, BERT_MODEL_NAME, onnx_dir=MODEL_DIR)
+    load_time = time.perf_counter() - start
+    rss_loaded = _rss_bytes()
+
+    get_bert_embeddings(texts[:batch_size], model, tokenizer, batch_size=batch_size)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        embeddings = get_bert_embeddings(texts, model, tokenizer, batch_size=batch_size)
+        timings.append(time.perf_counter() - start)
+
+    queue.put({
+        "backend": backend,
+        "embeddings": embeddings,
+        "load_time_s": load_time,
+        "model_rss_mb": (rss_loaded - rss_before) / 2**20,
+        "peak_rss_mb": _rss_bytes() / 2**20,
+        "p50_ms_per_text": float(np.median(timings)) * 1000 / len(texts),
+    })
+
+
+def run_isolated(backend, texts, batch_size, repeats, timeout=1800.0):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run_backend, args=(backend, texts, batch_size, repeats, queue))
+    process.start()
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                result = queue.get(timeout=1.0)
+                break
+            except queue_module.Empty:
+                pass
+            if not process.is_alive():
+                # The child may have exited right after putting its result
+                try:
+                    result = queue.get(timeout=1.0)
+                    break
+                except queue_module.Empty:
+                    raise RuntimeError(f"{backend} benchmark exited with code {process.exitcode} without a result")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{backend} benchmark did not finish within {timeout:.0f}s")
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+    return result
+
+
+def _cosine(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.sum(a * b, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "torch-int8", "onnx", "onnx-int8"])
+    parser.add_argument("--texts", help="File with one text per line (defaults to built-in samples)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = SAMPLE_TEXTS * 4
+
+    import joblib
+    from personality_prediction import MODEL_DIR
+    classifier = joblib.load(os.path.join(MODEL_DIR, "classifier.joblib"))
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    results = [run_isolated(b, texts, args.batch_size, args.repeats) for b in backends]
+    reference = results[0]
+    ref_probs = classifier.predict_proba(reference["embeddings"])
+
+    header = f"{'backend':<12}{'ms/text':>10}{'speedup':>9}{'load s':>9}{'model MB':>10}{'peak MB':>9}" \
+             f"{'min cos':>9}{'max |dp|':>10}{'top1 agree':>12}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        probs = classifier.predict_proba(result["embeddings"])
+        cosine = _cosine(reference["embeddings"], result["embeddings"])
+        agree = np.mean(np.argmax(probs, axis=1) == np.argmax(ref_probs, axis=1))
+        print(
+            f"{result['backend']:<12}"
+            f"{result['p50_ms_per_text']:>10.2f}"
+            f"{reference['p50_ms_per_text'] / result['p50_ms_per_text']:>8.2f}x"
+            f"{result['load_time_s']:>9.2f}"
+            f"{result['model_rss_mb']:>10.0f}"
+            f"{result['peak_rss_mb']:>9.0f}"
+            f"{cosine.min():>9.4f}"
+            f"{np.abs(probs - ref_probs).max():>10.4f}"
+            f"{agree:>11.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
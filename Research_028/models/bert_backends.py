@@ -0,0 +1,130 @@
+import os
+import numpy as np
+import torch
+from transformers import AutoModel
+
+# Selectable with the PERSONALITY_BACKEND environment variable
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+
+class _ClsOnly(torch.nn.Module):
+    """Exports only the CLS vector so ONNX Runtime does not copy out the full hidden state."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state[:, 0, :]
+
+
+class OnnxBertModel:
+    def __init__(self, onnx_path, num_threads=None):
+        """
+        BERT CLS encoder exported to ONNX and run with ONNX Runtime on CPU.
+
+        Args:
+            onnx_path (str): Path to the exported model
+            num_threads (int): Intra-op threads, defaults to ONNX Runtime's choice
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("The onnx backends need onnxruntime: pip install onnxruntime")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.onnx_path = onnx_path
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+
+    def cls_embeddings(self, input_ids, attention_mask):
+        """Run the encoder on int64 numpy arrays and return the (batch, hidden) CLS vectors."""
+        (cls,) = self.session.run(
+            ["cls_embedding"],
+            {"input_ids": input_ids.astype(np.int64), "attention_mask": attention_mask.astype(np.int64)},
+        )
+        return cls
+
+
+def load_torch_model(model_name, device=None):
+    model = AutoModel.from_pretrained(model_name)
+    model.to(device or ("cuda" if torch.cuda.is_available() else "cpu"))
+    model.eval()
+    return model
+
+
+def quantize_dynamic_int8(model):
+    """int8 dynamic quantization of every Linear layer (CPU only)."""
+    model.to("cpu")
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def export_onnx(model_name, onnx_path, opset=14):
+    """Export the fp32 encoder to ONNX with dynamic batch and sequence axes."""
+    model = load_torch_model(model_name, device="cpu")
+    dummy_ids = torch.ones((2, 16), dtype=torch.long)
+    dummy_mask = torch.ones((2, 16), dtype=torch.long)
+    os.makedirs(os.path.dirname(onnx_path) or ".", exist_ok=True)
+    tmp_path = f"{onnx_path}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            _ClsOnly(model),
+            (dummy_ids, dummy_mask),
+            tmp_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["cls_embedding"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "cls_embedding": {0: "batch"},
+            },
+            opset_version=opset,
+        )
+    os.replace(tmp_path, onnx_path)
+    return onnx_path
+
+
+def quantize_onnx_int8(onnx_path, output_path):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(onnx_path, output_path, weight_type=QuantType.QInt8)
+    return output_path
+
+
+def load_bert(backend, model_name, onnx_dir):
+    """
+    Load the BERT encoder for one of the inference backends.
+
+    torch      - fp32 PyTorch (CUDA when available)
+    torch-int8 - PyTorch with int8 dynamic-quantized Linear layers, CPU
+    onnx       - fp32 ONNX Runtime, exported on first use
+    onnx-int8  - ONNX Runtime with int8 dynamic-quantized weights
+
+    Args:
+        backend (str): One of BACKENDS
+        model_name (str): Hugging Face model name
+        onnx_dir (str): Where exported ONNX files are kept
+
+    Returns:
+        torch.nn.Module or OnnxBertModel
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+    if backend == "torch":
+        return load_torch_model(model_name)
+    if backend == "torch-int8":
+        return quantize_dynamic_int8(load_torch_model(model_name, device="cpu"))
+
+    onnx_path = os.path.join(onnx_dir, f"{model_name}.onnx")
+    if not os.path.exists(onnx_path):
+        export_onnx(model_name, onnx_path)
+    if backend == "onnx-int8":
+        int8_path = os.path.join(onnx_dir, f"{model_name}.int8.onnx")
+        if not os.path.exists(int8_path):
+            quantize_onnx_int8(onnx_path, int8_path)
+        onnx_path = int8_path
+    threads = os.getenv("ONNX_NUM_THREADS")
+    return OnnxBertModel(onnx_path, num_threads=int(threads) if threads else None)
@@ -0,0 +1,57 @@
+import os
+from typing import List
+
+CHUNK_CHARS = int(os.getenv("VECTORDB_CHUNK_CHARS", "2000"))
+CHUNK_OVERLAP = int(os.getenv("VECTORDB_CHUNK_OVERLAP", "200"))
+
+# Preferred places to end a chunk, strongest first
+_BREAKS = ("\n\n", "\n", ". ", "? ", "! ", "; ", ", ", " ")
+
+
+def _break_before(text: str, start: int, end: int) -> int:
+    """Index just after the strongest break in the second half of text[start:end], or `end` if there is none."""
+    floor = start + (end - start) // 2
+    for separator in _BREAKS:
+        position = text.rfind(separator, floor, end)
+        if position != -1:
+            return position + len(separator)
+    return end
+
+
+def chunk_text(text: str, max_chars: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """
+    Split a document into overlapping sections for embedding.
+
+    Sections are at most `max_chars` long and end on a paragraph, line,
+    sentence or word boundary where one exists. Consecutive sections share
+    about `overlap` characters so that text cut at a boundary still appears
+    whole in one of them.
+
+    Args:
+        text (str): Document text
+        max_chars (int): Maximum section length (about 4 characters per token)
+        overlap (int): Characters repeated from the end of the previous section
+
+    Returns:
+        List[str]: The sections, a single one for short documents
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text]
+    overlap = min(overlap, max_chars // 2)
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            end = _break_before(text, start, end)
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        # Step back by the overlap, then forward to the start of a word
+        next_start = max(end - overlap, start + 1)
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+    return chunks
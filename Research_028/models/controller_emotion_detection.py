@@ -1,41 +1,209 @@
-from s3_download import download_s3_file
-from emotion_recognition import EmotionPredictor , extract_frames_from_video
+from s3_download import download_s3_file, downloader
+from emotion_recognition import emotion_model_version, get_emotion_predictor
+from parallel_landmarks import landmark_extractor
+from adaptive_sampling import (AdaptiveSampler, count_emotions, extract_track, extract_track_from_stream,
+                               track_from_bytes, track_to_bytes)
+from video_spliter import is_streamable
+from job_queue import JobQueue, QueueFull
+from disk_cache import DiskCache
+import asyncio
+import hashlib
+import json
 import uuid
 from pydantic import BaseModel
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Response
 import os 
 from pathlib import Path
 
 
-def predict_emotions(url):
+CACHE_DIR = os.getenv("EMOTION_CACHE_DIR", os.path.join(Path(__file__).parent , "cache" , "emotion"))
+result_cache = DiskCache(os.path.join(CACHE_DIR, "results"), max_bytes=int(os.getenv("EMOTION_RESULT_CACHE_MB", "64")) * 2**20)
+landmark_cache = DiskCache(os.path.join(CACHE_DIR, "landmarks"), max_bytes=int(os.getenv("EMOTION_LANDMARK_CACHE_MB", "1024")) * 2**20)
+
+
+def extract_landmarks(video_path, fps=10, sampler=None, progress=None):
+    """Landmark track of a local video, on the process pool when more than one worker is configured."""
+    sampler = sampler or AdaptiveSampler.from_env()
+    if landmark_extractor.workers > 1:
+        return landmark_extractor.extract(video_path, fps, sampler=sampler, progress=progress)
+    predictor = get_emotion_predictor()
+    return extract_track(video_path, fps, sampler, predictor.extract_landmark_vector, progress=progress)
+
+
+def _download_and_extract(url, video_path, fps, sampler, report):
+    if landmark_extractor.workers > 1:
+        # The process pool needs the whole file, fetch it as parallel ranged parts
+        if not download_s3_file(url=url , output_path=video_path):
+            return None
+        report(0, None, "analyzing")
+        return extract_landmarks(video_path, fps=fps, sampler=sampler, progress=report)
+    
+    # Single process: decode frames while the rest of the video is still downloading
+    download = downloader.start(url, video_path)
+    try:
+        streamable = is_streamable(download.read_at)
+    except IOError:
+        streamable = False
+    if streamable:
+        report(0, None, "analyzing")
+        predictor = get_emotion_predictor()
+        try:
+            return extract_track_from_stream(
+                download.iter_bytes(), fps, sampler, predictor.extract_landmark_vector, progress=report
+            )
+        except IOError as e:
+            print(f"Streaming decode failed, falling back to the downloaded file: {e}")
+    if not download.wait():
+        return None
+    report(0, None, "analyzing")
+    return extract_landmarks(video_path, fps=fps, sampler=sampler, progress=report)
+
+
+def _video_identity(url):
+    """URL + ETag of the object, or None if the server does not provide an ETag."""
+    try:
+        etag = downloader.head(url)["etag"]
+    except Exception:
+        return None
+    return f"url={url}|etag={etag}" if etag else None
+
+
+def _file_identity(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return f"sha256={digest.hexdigest()}"
+
+
+def _landmark_key(video_id, fps, sampler):
+    # Landmarks do not depend on the classifier, so a retrained model can reuse them
+    return f"landmarks|{video_id}|fps={fps}|{sampler.cache_key()}"
+
+
+def _result_key(video_id, fps, sampler):
+    return f"{_landmark_key(video_id, fps, sampler)}|model={emotion_model_version()}"
+
+
+def _summarize(track):
+    # One scaler / classifier pass over every distinct frame with a detected face
+    predictor = get_emotion_predictor()
+    row_labels, _ = predictor.classify(track.features)
+    emotions = count_emotions(track, row_labels)
+    print(f"Classified {len(row_labels)} of {track.n_slots} frames: {emotions}")
+    return {
+        "emotions": emotions,
+        "frames_total": track.n_slots,
+        "frames_decoded": track.frames_decoded,
+        "frames_landmarked": track.frames_landmarked,
+        "frames_classified": len(row_labels),
+    }
+
+
+def _store(video_id, fps, sampler, track, analysis):
+    landmark_cache.put(_landmark_key(video_id, fps, sampler), track_to_bytes(track))
+    result_cache.put(_result_key(video_id, fps, sampler), json.dumps(analysis).encode("utf-8"))
+
+
+def _from_cache(video_id, fps, sampler):
+    cached = result_cache.get(_result_key(video_id, fps, sampler))
+    if cached is not None:
+        return {**json.loads(cached), "cache": "result"}
+    cached = landmark_cache.get(_landmark_key(video_id, fps, sampler))
+    if cached is not None:
+        # Same video, different model version: re-classify without FaceMesh
+        analysis = _summarize(track_from_bytes(cached))
+        result_cache.put(_result_key(video_id, fps, sampler), json.dumps(analysis).encode("utf-8"))
+        return {**analysis, "cache": "landmarks"}
+    return None
+
+
+def analyze_video(url, fps=10, progress=None):
+    """Download a video and count the predicted emotion of every frame.
+    
+    Args:
+        url (str): Public S3 URL of the video
+        fps (float): Frames per second to analyse
+        progress (Callable, optional): Called as progress(done, total, stage)
+    
+    Returns:
+        dict: Emotion counts plus how many frames were decoded, run through
+            FaceMesh and classified, or None if the download failed
+    """
+    report = progress or (lambda done, total=None, stage=None: None)
+    sampler = AdaptiveSampler.from_env()
+    
+    # Results are cached by URL + ETag, so a resubmitted video skips download and inference
+    video_id = _video_identity(url)
+    if video_id is not None:
+        cached = _from_cache(video_id, fps, sampler)
+        if cached is not None:
+            report(cached["frames_total"], cached["frames_total"], "done")
+            return cached
     
-    model_dir = os.path.join(Path(__file__).parent , "saved_model")
     video_path = os.path.join(Path(__file__).parent , "download" , f"{uuid.uuid4()}_sample.mp4" )
+    report(0, None, "downloading")
+    try:
+        if video_id is not None:
+            track = _download_and_extract(url, video_path, fps, sampler, report)
+        else:
+            # No ETag: download first and key the cache by content hash before any inference
+            if not download_s3_file(url=url , output_path=video_path):
+                return None
+            video_id = _file_identity(video_path)
+            cached = _from_cache(video_id, fps, sampler)
+            if cached is not None:
+                report(cached["frames_total"], cached["frames_total"], "done")
+                return cached
+            report(0, None, "analyzing")
+            track = extract_landmarks(video_path, fps=fps, sampler=sampler, progress=report)
+    finally:
+        if os.path.exists(video_path):
+            os.remove(video_path)
+    if track is None:
+        return None
     
-    if download_s3_file(url=url , output_path=video_path):
-      
-        predictor = EmotionPredictor(model_dir)
-        frame_paths = extract_frames_from_video(video_path, fps=10)
-        results = predictor.predict_batch(frame_paths)
-        final_output = {}
-        
-        for result in results:
-            frame_path = result['image_path']
-            prediction = result['prediction']
-            if prediction:
-                print(f"\nFrame: {frame_path}")
-                print(f"Emotion: {prediction['predicted_emotion']}")
-                if prediction['predicted_emotion'] not in final_output.keys():
-                    final_output[prediction['predicted_emotion']] = 1 
-                else:
-                    final_output[prediction['predicted_emotion']] += 1 
-        return final_output
-    else:
+    analysis = _summarize(track)
+    _store(video_id, fps, sampler, track, analysis)
+    report(track.n_slots, track.n_slots, "done")
+    return {**analysis, "cache": None}
+
+
+def predict_emotions(url):
+    analysis = analyze_video(url)
+    if analysis is None:
         return "S3 download failed"
+    return analysis["emotions"]
     
     
 
 
+class VideoDownloadError(Exception):
+    pass
+
+
+def _analyze_job(url, progress):
+    analysis = analyze_video(url, progress=progress)
+    if analysis is None:
+        raise VideoDownloadError("S3 download failed")
+    return analysis
+
+
+# Every video analysis, synchronous or not, goes through this bounded pool
+video_jobs = JobQueue(
+    _analyze_job,
+    max_concurrent=int(os.getenv("EMOTION_MAX_CONCURRENT_VIDEOS", "2")),
+    max_pending=int(os.getenv("EMOTION_MAX_QUEUED_VIDEOS", "8")),
+)
+
+
+def _submit_video(url):
+    try:
+        return video_jobs.submit(url)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+
+
 class EmotionPrediction(BaseModel):
     s3_link:str
 
@@ -43,7 +211,57 @@ class EmotionPrediction(BaseModel):
 router = APIRouter()
 
 @router.post("/predict-emotion")
-async def predict_personality_endpoint(emotion:EmotionPrediction):
-    predictions = predict_emotions(url=emotion.s3_link)
-    return predictions
-    
+async def predict_personality_endpoint(emotion:EmotionPrediction, response:Response):
+    # Runs on the job pool so the event loop stays free for the other routes
+    job = _submit_video(emotion.s3_link)
+    try:
+        analysis = await asyncio.wrap_future(job.future)
+    except VideoDownloadError:
+        analysis = None
+    if analysis is None:
+        return "S3 download failed"
+    # The body stays a plain {emotion: count} map, the sampling figures go in headers
+    response.headers["X-Frames-Total"] = str(analysis["frames_total"])
+    response.headers["X-Frames-Landmarked"] = str(analysis["frames_landmarked"])
+    response.headers["X-Frames-Classified"] = str(analysis["frames_classified"])
+    response.headers["X-Cache"] = analysis["cache"] or "miss"
+    return analysis["emotions"]
+
+
+@router.post("/jobs", status_code=202)
+async def submit_emotion_job(emotion:EmotionPrediction):
+    """Queue a video for analysis and return its job id straight away"""
+    job = _submit_video(emotion.s3_link)
+    return job.to_dict()
+
+
+@router.get("/cache/stats")
+async def emotion_cache_stats():
+    return {"results": result_cache.stats(), "landmarks": landmark_cache.stats()}
+
+
+@router.get("/jobs/stats")
+async def emotion_job_stats():
+    return video_jobs.stats()
+
+
+@router.get("/jobs/{job_id}")
+async def get_emotion_job(job_id:str):
+    """Status and progress (frames processed out of total) of a job"""
+    job = video_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_emotion_job_result(job_id:str):
+    """Emotion counts of a finished job"""
+    job = video_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return {**job.to_dict(), "result": job.result}
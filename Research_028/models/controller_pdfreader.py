@@ -1,13 +1,16 @@
 
-from pdf_reader import pdf_text_extractor
+from pdf_reader import EXTRACTOR_VERSION, PDF2TXT, pdf_extractor
+from disk_cache import DiskCache
+from document_store import DocumentStore
+import hashlib
+import json
 import os
-import tempfile
-import shutil
-import sqlite3
 from fastapi import APIRouter, File, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pathlib import Path
 from pydantic import BaseModel
-from typing import List 
+from typing import Dict, List, Optional, Tuple
 
 
 router = APIRouter()
@@ -19,64 +22,96 @@ class DocumentContent(BaseModel):
     document_name: str
     content: str    
 
+class Page(BaseModel):
+    page_number: int
+    content: str
 
-def init_db():
-    conn = sqlite3.connect('documents.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS documents (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            document_name TEXT NOT NULL,
-            content TEXT NOT NULL
-        )
-    ''')
-    conn.commit()
-    conn.close()
 
-init_db()
+document_store = DocumentStore()
+
+CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(Path(__file__).parent , "cache" , "pdf"))
+ocr_cache = DiskCache(CACHE_DIR, max_bytes=int(os.getenv("PDF_OCR_CACHE_MB", "256")) * 2**20)
+
+
+async def _read_upload(file: UploadFile) -> Tuple[bytes, str]:
+    """Content of an upload and its SHA-256, hashed block by block as it is read."""
+    digest = hashlib.sha256()
+    blocks = []
+    while True:
+        block = await file.read(1024 * 1024)
+        if not block:
+            break
+        digest.update(block)
+        blocks.append(block)
+    return b"".join(blocks), digest.hexdigest()
+
+
+def _cache_key(sha256: str) -> str:
+    return f"pages|sha256={sha256}|extractor={EXTRACTOR_VERSION}"
+
+
+def _extract_cached(data: bytes, sha256: str):
+    cached = ocr_cache.get(_cache_key(sha256))
+    if cached is not None:
+        return PDF2TXT(page_content=json.loads(cached))
+    pdf_contents = pdf_extractor.extract(data)
+    ocr_cache.put(_cache_key(sha256), json.dumps(pdf_contents.page_content).encode("utf-8"))
+    return pdf_contents
 
 
 @router.post("/ocr_only" , tags=["OCR"])
 async def ocr_only_pdf(file:UploadFile=File(...)):
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            shutil.copyfileobj(file.file, tmp)
-            temp_file_path = tmp.name
-
-        pdf_contents = pdf_text_extractor(pdf_file_path=temp_file_path)
-        os.remove(temp_file_path)
+        # UploadFile is already spooled (in memory, on disk past 1 MB), no extra copy to a temp file
+        data, sha256 = await _read_upload(file)
+        pdf_contents = await run_in_threadpool(_extract_cached, data, sha256)
         return {"content":pdf_contents}
     except Exception as e:
         return {"error": str(e)}
     
 
+def _stream_pages(data: bytes, sha256: str):
+    cached = ocr_cache.get(_cache_key(sha256))
+    if cached is not None:
+        for page in json.loads(cached):
+            yield json.dumps(page) + "\n"
+        return
+    pages = []
+    try:
+        for page in pdf_extractor.iter_pages(data):
+            pages.append(page)
+            yield json.dumps(page) + "\n"
+    except Exception as e:
+        yield json.dumps({"error": str(e)}) + "\n"
+        return
+    pages.sort(key=lambda page: page["page_number"])
+    ocr_cache.put(_cache_key(sha256), json.dumps(pages).encode("utf-8"))
+
+
+@router.post("/ocr_stream", tags=["OCR"])
+async def ocr_stream_pdf(file: UploadFile = File(...)):
+    """Extract the text of a PDF, streamed back as NDJSON with one
+    {"page_number", "content"} line per page as soon as it is extracted.
+    Pages may arrive out of order on large documents."""
+    data, sha256 = await _read_upload(file)
+    # A sync generator is iterated in the threadpool, so extraction stays off the event loop
+    return StreamingResponse(_stream_pages(data, sha256), media_type="application/x-ndjson")
+
+
+@router.get("/ocr/cache/stats", tags=["OCR"])
+async def ocr_cache_stats():
+    """Entries, size and hit rate of the extracted page cache"""
+    return ocr_cache.stats()
+
+
 @router.post('/ocr_pypdf', tags=["OCR"])
 async def ocr_pdf(file: UploadFile = File(...)):
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            shutil.copyfileobj(file.file, tmp)
-            temp_file_path = tmp.name
-
-        pdf_contents = pdf_text_extractor(pdf_file_path=temp_file_path)
-        os.remove(temp_file_path)
-
-        
-        if hasattr(pdf_contents, 'get_text'):
-            pdf_text = pdf_contents.get_text()
-        elif hasattr(pdf_contents, '__str__'):
-            pdf_text = str(pdf_contents)
-        else:
-            raise ValueError("Unable to convert PDF contents to string")
-
-        # Save to SQLite database
-        conn = sqlite3.connect('documents.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO documents (document_name, content)
-            VALUES (?, ?)
-        ''', (file.filename, pdf_text))
-        conn.commit()
-        conn.close()
+        data, sha256 = await _read_upload(file)
+        pdf_contents = await run_in_threadpool(_extract_cached, data, sha256)
+
+        # Save to SQLite database, one compressed row per page
+        await document_store.ainsert(file.filename, pdf_contents.page_content)
 
         return {"filename": file.filename, "status": "Document saved to database"}
     except Exception as e:
@@ -85,28 +120,52 @@ async def ocr_pdf(file: UploadFile = File(...)):
 @router.get('/documents', tags=["Documents"], response_model=List[Document])
 async def get_documents():
     try:
-        conn = sqlite3.connect('documents.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT document_name FROM documents')
-        documents = cursor.fetchall()
-        conn.close()
-
-        return [Document(document_name=doc[0]) for doc in documents]
+        return [Document(document_name=name) for name in await document_store.anames()]
     except Exception as e:
         return {"error": str(e)}
 
 
-def get_document_by_name(document_name: str):
+async def get_document_by_name(document_name: str):
+    try:
+        document = await document_store.aget(document_name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    return DocumentContent(document_name=document[0], content=document[1])
+
+
+async def get_document_pages(document_name: str, start: int = 0, stop: Optional[int] = None) -> List[Dict]:
     try:
-        conn = sqlite3.connect('documents.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT document_name, content FROM documents WHERE document_name = ?', (document_name,))
-        document = cursor.fetchone()
-        conn.close()
+        pages = await document_store.apages(document_name, start, stop)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if pages is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return pages
 
-        if document is None:
-            raise HTTPException(status_code=404, detail="Document not found")
 
-        return DocumentContent(document_name=document[0], content=document[1])
+async def search_document_pages(document_name: str, query: str, limit: int = 10) -> List[Dict]:
+    try:
+        pages = await document_store.asearch(document_name, query, limit)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if pages is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return pages
+
+
+@router.get('/documents/{document_name}/pages', tags=["Documents"], response_model=List[Page])
+async def get_pages(document_name: str, start: int = 0, stop: Optional[int] = None):
+    """Pages [start, stop) of a stored document, up to the last page when stop is omitted"""
+    return await get_document_pages(document_name, start, stop)
+
+
+@router.get('/documents/{document_name}/search', tags=["Documents"], response_model=List[Page])
+async def search_pages(document_name: str, query: str, limit: int = 10):
+    """Pages of a stored document matching any word of the query, best match first"""
+    return await search_document_pages(document_name, query, limit)
\ No newline at end of file
@@ -1,7 +1,8 @@
 import json 
 from pydantic import BaseModel
-from fastapi import APIRouter
-from personality_prediction import predict_personality
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from personality_prediction import predict_personality_async, predict_personality_batch, personality_batcher
 
 
 class PersonalityPrediction(BaseModel):
@@ -12,7 +13,7 @@ router = APIRouter()
 
 @router.post("/predict-personality")
 async def predict_personality_endpoint(personality:PersonalityPrediction):
-    predictions = predict_personality(text=personality.sentence)
+    predictions = await predict_personality_async(text=personality.sentence)
     
     predictions_list = {}
     if "error" not in predictions:
@@ -21,5 +22,82 @@ async def predict_personality_endpoint(personality:PersonalityPrediction):
         print("returned predictions" , predictions_list)
         return predictions_list
     else:
-        print(predictions["error"]) 
+        print(predictions["error"])
 
+
+@router.get("/predict-personality/stats")
+async def predict_personality_stats():
+    """Batch sizes seen by the inference queue and their p50/p99 latency"""
+    return personality_batcher.stats()
+
+
+def _parse_batch_item(item, index):
+    # Items are either plain strings or {"id": ..., "sentence": ...} objects
+    if isinstance(item, str):
+        return index, item
+    if isinstance(item, dict) and isinstance(item.get("sentence"), str):
+        return item.get("id", index), item["sentence"]
+    raise HTTPException(status_code=400, detail=f"Item {index} must be a string or an object with a 'sentence'")
+
+
+def _parse_ndjson(raw: bytes):
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"NDJSON must be UTF-8: {e}")
+    items = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON on line {line_number}: {e}")
+    return items
+
+
+def _stream_predictions(items, chunk_size):
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        try:
+            results = predict_personality_batch([text for _, text in chunk])
+            lines = [{"id": item_id, "predictions": predictions} for (item_id, _), predictions in zip(chunk, results)]
+        except Exception as e:
+            lines = [{"id": item_id, "error": f"Prediction failed: {str(e)}"} for item_id, _ in chunk]
+        yield "".join(json.dumps(line) + "\n" for line in lines)
+
+
+@router.post("/predict-personality/batch")
+async def predict_personality_batch_endpoint(request: Request, chunk_size: int = 64):
+    """Score many sentences in one request.
+
+    Accepts a JSON array (or {"sentences": [...]}), an NDJSON body
+    (Content-Type: application/x-ndjson) or an NDJSON file uploaded as
+    multipart field "file". Each item is a string or {"id", "sentence"}.
+    Results are streamed back as NDJSON, one line per item, as each chunk
+    of `chunk_size` texts finishes.
+    """
+    if chunk_size < 1:
+        raise HTTPException(status_code=400, detail="chunk_size must be positive")
+
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Missing NDJSON file field 'file'")
+        raw_items = _parse_ndjson(await upload.read())
+    elif "ndjson" in content_type or "jsonlines" in content_type:
+        raw_items = _parse_ndjson(await request.body())
+    else:
+        try:
+            payload = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+        raw_items = payload.get("sentences") if isinstance(payload, dict) else payload
+        if not isinstance(raw_items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or {\"sentences\": [...]}")
+
+    items = [_parse_batch_item(item, index) for index, item in enumerate(raw_items)]
+    # A sync generator is iterated in the threadpool, so inference stays off the event loop
+    return StreamingResponse(_stream_predictions(items, chunk_size), media_type="application/x-ndjson")
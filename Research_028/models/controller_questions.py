@@ -1,25 +1,37 @@
 import requests
-from openai_functioncall import question_generation
-from controller_pdfreader import get_document_by_name
+from openai_functioncall import QUESTION_GENERATOR_VERSION, question_generation
+from controller_pdfreader import document_store
+from pdf_reader import PDF2TXT
+from question_bank import BankKey, QuestionBank
 import json 
 from pydantic import BaseModel
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
 
-def get_document_info(document_name):
-    document = get_document_by_name(document_name=document_name)
-    return document.content
+QUESTIONS_PER_QUIZ = 10
 
-class Topic(BaseModel):
-    topic:str
-    difficulty_level:str
 
+def get_document_info(document_name, start_page=None, end_page=None, query=None, max_pages=10):
+    if query:
+        pages = document_store.search(document_name, query, max_pages)
+    elif start_page is not None or end_page is not None:
+        pages = document_store.pages(document_name, start_page or 0, end_page)
+    else:
+        document = document_store.get(document_name)
+        if document is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        return document[1]
+    if pages is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    # Same text format as a whole document, limited to the selected pages
+    return str(PDF2TXT(page_content=sorted(pages, key=lambda page: page["page_number"])))
 
-router = APIRouter()
 
-@router.post("/get-questions")
-async def get_questions(topic:Topic):
-    content = get_document_info(topic.topic)
-    questions = question_generation(context=content , difficulty_level=topic.difficulty_level)
+def generate_questions(key: BankKey):
+    """One batch of questions for a question bank key (runs on a worker thread)."""
+    content = get_document_info(key.document_name, **json.loads(key.scope or "{}"))
+    questions = question_generation(context=content , difficulty_level=key.difficulty)
     questions_list = []
 
     for question in questions:
@@ -34,3 +46,41 @@ async def get_questions(topic:Topic):
     return questions_list
 
 
+question_bank = QuestionBank(document_store.path, generate_questions)
+
+class Topic(BaseModel):
+    topic:str
+    difficulty_level:str
+    # Optional: generate from pages [start_page, end_page) or from the pages matching `query`
+    start_page: Optional[int] = None
+    end_page: Optional[int] = None
+    query: Optional[str] = None
+    max_pages: int = 10
+
+    def bank_key(self) -> BankKey:
+        if self.query:
+            scope = {"query": self.query, "max_pages": self.max_pages}
+        elif self.start_page is not None or self.end_page is not None:
+            scope = {"start_page": self.start_page, "end_page": self.end_page}
+        else:
+            scope = None
+        return BankKey(
+            document_name=self.topic,
+            difficulty=self.difficulty_level,
+            scope=json.dumps(scope, sort_keys=True) if scope else "",
+            generator_version=QUESTION_GENERATOR_VERSION,
+        )
+
+
+router = APIRouter()
+
+@router.post("/get-questions")
+async def get_questions(topic:Topic):
+    # Served from the question bank; only a document/difficulty seen for the first time waits for generation
+    return await run_in_threadpool(question_bank.get, topic.bank_key(), QUESTIONS_PER_QUIZ)
+
+
+@router.get("/question-bank/stats")
+async def question_bank_stats():
+    """Stored questions, bank hit rate and background refills"""
+    return question_bank.stats()
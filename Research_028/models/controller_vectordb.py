@@ -1,12 +1,14 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
-from fastapi.responses import JSONResponse 
-from fastapi import APIRouter
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+from datetime import datetime
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import APIRouter, Query, Response
 from dotenv import load_dotenv
 import os
-# Import the VectorDBManager
-from vectordb import VectorDBManager
+import json
+# Import the AsyncVectorDBManager
+from vectordb import AsyncVectorDBManager, metadata_filter
 
 router = APIRouter()
 
@@ -17,43 +19,118 @@ try:
 except FileNotFoundError:
     print("No .Env File found.Please add .env file")
 
-db_manager = VectorDBManager(
+db_manager = AsyncVectorDBManager(
     openai_api_key=os.getenv("OPENAI_KEY"),
     persist_directory="./recruitment_project/chromadb"
 )
 
 # Pydantic models for request validation
-class JobCreate(BaseModel):
+class DocumentMetadata(BaseModel):
+    company: Optional[str] = None
+    location: Optional[str] = None
+    posted_at: Optional[datetime] = None
+    active: Optional[bool] = None
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "company": self.company,
+            "location": self.location,
+            "posted_at": self.posted_at,
+            "active": self.active,
+        }
+
+class JobCreate(DocumentMetadata):
     job_id: str
     job_text: str
 
-class ResumeCreate(BaseModel):
+class ResumeCreate(DocumentMetadata):
     resume_id: str
     resume_text: str
 
+class BulkJobCreate(BaseModel):
+    jobs: List[JobCreate]
+    batch_size: Optional[int] = None
+    max_concurrency: Optional[int] = None
+
+class BulkResumeCreate(BaseModel):
+    resumes: List[ResumeCreate]
+    batch_size: Optional[int] = None
+    max_concurrency: Optional[int] = None
+
 class SearchQuery(BaseModel):
     query_text: str
     n_results: Optional[int] = 5
+    aggregate: Literal["max", "mean"] = "max"
+    top_k: int = 3
+    # "lexical" answers from the BM25 index alone, without an embedding request
+    mode: Literal["vector", "lexical", "hybrid"] = "vector"
+    # Metadata filters, applied inside the vector query
+    company: Optional[str] = None
+    location: Optional[str] = None
+    active: Optional[bool] = None
+    posted_after: Optional[datetime] = None
+    posted_before: Optional[datetime] = None
+    where: Optional[Dict[str, Any]] = None
+
+    def filter(self) -> Optional[Dict[str, Any]]:
+        return metadata_filter(
+            company=self.company,
+            location=self.location,
+            active=self.active,
+            posted_after=self.posted_after,
+            posted_before=self.posted_before,
+            where=self.where,
+        )
+
+class MatchQuery(BaseModel):
+    job_ids: Optional[List[str]] = None
+    resume_ids: Optional[List[str]] = None
+    top_k: int = Field(10, ge=1)
 
 # Response models
 class Job(BaseModel):
     id: str
-    text: str
+    text: Optional[str] = None
 
 class Resume(BaseModel):
     id: str
-    text: str
+    text: Optional[str] = None
+
+class BulkItemStatus(BaseModel):
+    id: str
+    status: str
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    created: int
+    failed: int
+    items: List[BulkItemStatus]
+
+class Match(BaseModel):
+    id: str
+    score: float
+    distance: float
+
+class MatchResult(BaseModel):
+    matches: Dict[str, List[Match]]
+    missing: List[str]
 
 class SearchResult(BaseModel):
     id: str
     text: str
-    distance: float
+    distance: Optional[float] = None
+    score: Optional[float] = None
+
+@router.get("/embedding-cache/stats")
+async def embedding_cache_stats():
+    """Hit/miss counters of the embedding cache"""
+    return db_manager.embedding_cache.stats()
 
 @router.post("/jobs/", response_model=dict)
 async def create_job(job: JobCreate):
     """Create a new job posting"""
     try:
-        db_manager.add_job(job_id=job.job_id, job_text=job.job_text)
+        await db_manager.add_job(job_id=job.job_id, job_text=job.job_text, metadata=job.metadata())
         return {"message": f"Job {job.job_id} created successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -62,24 +139,101 @@ async def create_job(job: JobCreate):
 async def create_resume(resume: ResumeCreate):
     """Create a new resume"""
     try:
-        db_manager.add_resume(resume_id=resume.resume_id, resume_text=resume.resume_text)
+        await db_manager.add_resume(
+            resume_id=resume.resume_id, resume_text=resume.resume_text, metadata=resume.metadata()
+        )
         return {"message": f"Resume {resume.resume_id} created successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/jobs/", response_model=List[Job])
-async def list_jobs():
-    """List all jobs"""
+def _bulk_result(items):
+    created = sum(item['status'] == 'created' for item in items)
+    return {"created": created, "failed": len(items) - created, "items": items}
+
+@router.post("/jobs/bulk", response_model=BulkResult)
+async def create_jobs(bulk: BulkJobCreate):
+    """Create or update many job postings, embedding them in batches"""
+    try:
+        items = await db_manager.add_jobs(
+            [(job.job_id, job.job_text, job.metadata()) for job in bulk.jobs],
+            batch_size=bulk.batch_size,
+            max_concurrency=bulk.max_concurrency
+        )
+        return _bulk_result(items)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/resumes/bulk", response_model=BulkResult)
+async def create_resumes(bulk: BulkResumeCreate):
+    """Create or update many resumes, embedding them in batches"""
+    try:
+        items = await db_manager.add_resumes(
+            [(resume.resume_id, resume.resume_text, resume.metadata()) for resume in bulk.resumes],
+            batch_size=bulk.batch_size,
+            max_concurrency=bulk.max_concurrency
+        )
+        return _bulk_result(items)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _stream_json_array(items, flush_every: int = 100):
+    """Serialize an async iterator of dicts as one JSON array, a few items per chunk."""
+    yield "["
+    buffer, first = [], True
+    async for item in items:
+        buffer.append(("" if first else ",") + json.dumps(item))
+        first = False
+        if len(buffer) >= flush_every:
+            yield "".join(buffer)
+            buffer = []
+    yield "".join(buffer) + "]"
+
+def _list_response(items, response: Response, offset: int, limit: Optional[int]):
+    if limit is not None and len(items) == limit:
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    return items
+
+@router.get("/jobs/", response_model=List[Job], response_model_exclude_none=True)
+async def list_jobs(
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    fields: Literal["full", "truncated", "ids"] = "full",
+    max_chars: int = Query(200, ge=0),
+    stream: bool = False,
+):
+    """
+    List jobs.
+
+    Without parameters every job is returned with its full text. `offset`/`limit`
+    select a page (X-Next-Offset is set while more may follow), `fields` picks a
+    projection, and `stream=true` streams the same JSON array without building it in memory.
+    """
     try:
-        return db_manager.list_jobs()
+        if stream:
+            items = db_manager.iter_jobs(offset, limit, fields, max_chars)
+            return StreamingResponse(_stream_json_array(items), media_type="application/json")
+        items = await db_manager.list_jobs(offset, limit, fields, max_chars)
+        return _list_response(items, response, offset, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/resumes/", response_model=List[Resume])
-async def list_resumes():
-    """List all resumes"""
+@router.get("/resumes/", response_model=List[Resume], response_model_exclude_none=True)
+async def list_resumes(
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    fields: Literal["full", "truncated", "ids"] = "full",
+    max_chars: int = Query(200, ge=0),
+    stream: bool = False,
+):
+    """List resumes, with the same paging, projection and streaming options as GET /jobs/"""
     try:
-        return db_manager.list_resumes()
+        if stream:
+            items = db_manager.iter_resumes(offset, limit, fields, max_chars)
+            return StreamingResponse(_stream_json_array(items), media_type="application/json")
+        items = await db_manager.list_resumes(offset, limit, fields, max_chars)
+        return _list_response(items, response, offset, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -87,7 +241,7 @@ async def list_resumes():
 async def delete_job(job_id: str):
     """Delete a job posting"""
     try:
-        db_manager.delete_job(job_id)
+        await db_manager.delete_job(job_id)
         return {"message": f"Job {job_id} deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -96,31 +250,63 @@ async def delete_job(job_id: str):
 async def delete_resume(resume_id: str):
     """Delete a resume"""
     try:
-        db_manager.delete_resume(resume_id)
+        await db_manager.delete_resume(resume_id)
         return {"message": f"Resume {resume_id} deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
-@router.post("/jobs/search/", response_model=List[SearchResult])
+@router.post("/jobs/search/", response_model=List[SearchResult], response_model_exclude_none=True)
 async def search_jobs(query: SearchQuery):
     """Search for similar jobs"""
     try:
-        results = db_manager.search_similar_jobs(
+        results = await db_manager.search_similar_jobs(
             query_text=query.query_text,
-            n_results=query.n_results
+            n_results=query.n_results,
+            aggregate=query.aggregate,
+            top_k=query.top_k,
+            where=query.filter(),
+            mode=query.mode
         )
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/resumes/search/", response_model=List[SearchResult])
+@router.post("/resumes/search/", response_model=List[SearchResult], response_model_exclude_none=True)
 async def search_resumes(query: SearchQuery):
     """Search for similar resumes"""
     try:
-        results = db_manager.search_similar_resumes(
+        results = await db_manager.search_similar_resumes(
             query_text=query.query_text,
-            n_results=query.n_results
+            n_results=query.n_results,
+            aggregate=query.aggregate,
+            top_k=query.top_k,
+            where=query.filter(),
+            mode=query.mode
         )
         return results
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/chunks/backfill")
+async def backfill_chunks(batch_size: Optional[int] = None):
+    """Split and embed jobs and resumes stored before chunked embeddings were introduced"""
+    try:
+        return await db_manager.backfill_chunks(batch_size)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/match/jobs-to-resumes", response_model=MatchResult)
+async def match_jobs_to_resumes(query: MatchQuery):
+    """Best stored resumes for each job (all jobs when job_ids is omitted), without new embeddings"""
+    try:
+        return await db_manager.match_jobs_to_resumes(query.job_ids, query.resume_ids, query.top_k)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/match/resumes-to-jobs", response_model=MatchResult)
+async def match_resumes_to_jobs(query: MatchQuery):
+    """Best stored jobs for each resume (all resumes when resume_ids is omitted), without new embeddings"""
+    try:
+        return await db_manager.match_resumes_to_jobs(query.resume_ids, query.job_ids, query.top_k)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
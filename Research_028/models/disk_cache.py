@@ -0,0 +1,116 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+class DiskCache:
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Persistent key/value cache of byte blobs with LRU eviction by total size.
+
+        Values are stored as files named after the SHA-256 of their key; an
+        SQLite index tracks their size and last access time. When the total
+        size exceeds `max_bytes` the least recently used entries are removed.
+
+        Args:
+            directory (str): Where blobs and the index are stored
+            max_bytes (int): Upper bound on the total size of stored blobs
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key_hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+        self._conn.commit()
+        self._total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def _path(self, key_hash: str) -> str:
+        return os.path.join(self.directory, key_hash[:2], key_hash)
+
+    @staticmethod
+    def _hash(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached value for `key`, or None."""
+        key_hash = self._hash(key)
+        try:
+            with open(self._path(key_hash), "rb") as f:
+                value = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+                # Blob removed behind our back, forget it
+                self._forget(key_hash)
+            return None
+        with self._lock:
+            self.hits += 1
+            self._conn.execute('UPDATE entries SET last_access = ? WHERE key_hash = ?', (time.time(), key_hash))
+            self._conn.commit()
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        """Store `value` under `key`, evicting least recently used entries if over budget."""
+        if len(value) > self.max_bytes:
+            return
+        key_hash = self._hash(key)
+        path = self._path(key_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(value)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._forget(key_hash)
+            self._conn.execute(
+                'INSERT INTO entries (key_hash, size, last_access) VALUES (?, ?, ?)',
+                (key_hash, len(value), time.time())
+            )
+            self._total += len(value)
+            self._evict()
+            self._conn.commit()
+
+    def _forget(self, key_hash: str) -> None:
+        row = self._conn.execute('SELECT size FROM entries WHERE key_hash = ?', (key_hash,)).fetchone()
+        if row is not None:
+            self._conn.execute('DELETE FROM entries WHERE key_hash = ?', (key_hash,))
+            self._total -= row[0]
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes:
+            row = self._conn.execute('SELECT key_hash, size FROM entries ORDER BY last_access LIMIT 1').fetchone()
+            if row is None:
+                break
+            key_hash, size = row
+            self._conn.execute('DELETE FROM entries WHERE key_hash = ?', (key_hash,))
+            self._total -= size
+            try:
+                os.remove(self._path(key_hash))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
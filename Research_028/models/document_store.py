@@ -0,0 +1,233 @@
+import ast
+import asyncio
+import os
+import queue
+import re
+import sqlite3
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from pdf_reader import PDF2TXT
+
+DOCUMENTS_DB = os.getenv("DOCUMENTS_DB", "documents.db")
+DOCUMENTS_DB_POOL_SIZE = int(os.getenv("DOCUMENTS_DB_POOL_SIZE", "4"))
+PAGE_COMPRESSION_LEVEL = int(os.getenv("DOCUMENTS_PAGE_COMPRESSION_LEVEL", "6"))
+
+# Documents used to be stored as the repr of a whole pdf_reader.PDF2TXT
+LEGACY_PREFIX = "PDF2TXT(page_content="
+
+# Statements are kept as constants so every connection reuses its compiled copy from the statement cache
+INSERT_DOCUMENT = "INSERT INTO documents (document_name, content, page_count) VALUES (?, '', ?)"
+INSERT_PAGE = 'INSERT INTO document_pages (document_id, page_number, content) VALUES (?, ?, ?)'
+INSERT_PAGE_TEXT = 'INSERT INTO document_pages_fts (rowid, content) VALUES (?, ?)'
+SELECT_NAMES = 'SELECT document_name FROM documents ORDER BY id'
+SELECT_ID = 'SELECT id FROM documents WHERE document_name = ? ORDER BY id LIMIT 1'
+SELECT_PAGES = (
+    'SELECT page_number, content FROM document_pages '
+    'WHERE document_id = ? AND page_number >= ? AND page_number < ? ORDER BY page_number'
+)
+SELECT_MATCHING_PAGES = (
+    'SELECT p.page_number, p.content FROM document_pages_fts f JOIN document_pages p ON p.id = f.rowid '
+    'WHERE document_pages_fts MATCH ? AND p.document_id = ? ORDER BY f.rank LIMIT ?'
+)
+SELECT_LEGACY = 'SELECT id, content FROM documents WHERE page_count IS NULL'
+UPDATE_MIGRATED = "UPDATE documents SET content = '', page_count = ? WHERE id = ?"
+
+
+def _compress(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), PAGE_COMPRESSION_LEVEL)
+
+
+def _decompress(blob: bytes) -> str:
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def _fts_query(query: str) -> str:
+    # Quote every word so user input is never parsed as FTS5 syntax; any word may match
+    return " OR ".join(f'"{word}"' for word in re.findall(r"\w+", query))
+
+
+def parse_legacy_content(content: str) -> List[Dict]:
+    """Pages of a document stored as `str(PDF2TXT(...))`; unparseable content becomes a single page."""
+    if content.startswith(LEGACY_PREFIX) and content.endswith(")"):
+        try:
+            pages = ast.literal_eval(content[len(LEGACY_PREFIX):-1])
+            if isinstance(pages, list) and all(isinstance(page, dict) for page in pages):
+                return pages
+        except (ValueError, SyntaxError):
+            pass
+    return [{"page_number": 0, "content": content}]
+
+
+class DocumentStore:
+    def __init__(self, path: str = DOCUMENTS_DB, pool_size: int = DOCUMENTS_DB_POOL_SIZE):
+        """
+        SQLite store of extracted documents shared by the PDF and question routes.
+
+        Every page is its own zlib-compressed row, indexed by a contentless
+        FTS5 table, so callers can read a page range or the pages matching a
+        query without loading the whole document. Documents stored by older
+        versions as one `str(PDF2TXT(...))` value are split into pages on
+        startup.
+
+        A fixed pool of connections in WAL mode lets readers run while a
+        document is being written, and `document_name` is indexed so a
+        lookup does not scan the table. The async methods run the queries on
+        a thread executor with one thread per pooled connection, off the
+        event loop.
+
+        Args:
+            path (str): SQLite database file
+            pool_size (int): Pooled connections (and executor threads)
+        """
+        self.path = path
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(max(pool_size, 1)):
+            conn = sqlite3.connect(path, check_same_thread=False, cached_statements=64)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._pool.put(conn)
+        self._executor = ThreadPoolExecutor(max_workers=max(pool_size, 1), thread_name_prefix="document-store")
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    document_name TEXT NOT NULL,
+                    content TEXT NOT NULL
+                )
+            ''')
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(documents)')]
+            if "page_count" not in columns:
+                # NULL marks documents still stored in the legacy single-value format
+                conn.execute('ALTER TABLE documents ADD COLUMN page_count INTEGER')
+            conn.execute('CREATE INDEX IF NOT EXISTS documents_name ON documents (document_name)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS document_pages (
+                    id INTEGER PRIMARY KEY,
+                    document_id INTEGER NOT NULL,
+                    page_number INTEGER NOT NULL,
+                    content BLOB NOT NULL
+                )
+            ''')
+            conn.execute(
+                'CREATE UNIQUE INDEX IF NOT EXISTS document_pages_number ON document_pages (document_id, page_number)'
+            )
+            # Contentless: the text lives compressed in document_pages, FTS5 only keeps the index
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS document_pages_fts USING fts5(content, content='')")
+            conn.commit()
+            self._migrate_legacy(conn)
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @staticmethod
+    def _insert_pages(conn: sqlite3.Connection, document_id: int, pages: List[Dict]) -> None:
+        for page in pages:
+            text = page.get("content") or ""
+            page_id = conn.execute(INSERT_PAGE, (document_id, page["page_number"], _compress(text))).lastrowid
+            conn.execute(INSERT_PAGE_TEXT, (page_id, text))
+
+    def _migrate_legacy(self, conn: sqlite3.Connection) -> int:
+        """Split legacy documents into page rows, returns how many were migrated."""
+        migrated = 0
+        for document_id, content in conn.execute(SELECT_LEGACY).fetchall():
+            pages = parse_legacy_content(content)
+            with conn:
+                self._insert_pages(conn, document_id, pages)
+                conn.execute(UPDATE_MIGRATED, (len(pages), document_id))
+            migrated += 1
+        if migrated:
+            # Give the space of the uncompressed values back to the file system
+            conn.execute('VACUUM')
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return migrated
+
+    def insert(self, document_name: str, pages: List[Dict]) -> int:
+        """Store the {"page_number", "content"} pages of a document, returns its row id."""
+        with self._connection() as conn:
+            with conn:
+                document_id = conn.execute(INSERT_DOCUMENT, (document_name, len(pages))).lastrowid
+                self._insert_pages(conn, document_id, pages)
+                return document_id
+
+    def names(self) -> List[str]:
+        """Names of the stored documents, oldest first."""
+        with self._connection() as conn:
+            return [row[0] for row in conn.execute(SELECT_NAMES)]
+
+    def pages(self, document_name: str, start: int = 0, stop: Optional[int] = None) -> Optional[List[Dict]]:
+        """
+        Pages [start, stop) of the first document stored under that name.
+
+        Args:
+            document_name (str): Name of the document
+            start (int): First page number
+            stop (int, optional): Page number after the last one, up to the end when None
+
+        Returns:
+            List[Dict]: {"page_number", "content"} pages in order, None if there is no such document
+        """
+        with self._connection() as conn:
+            row = conn.execute(SELECT_ID, (document_name,)).fetchone()
+            if row is None:
+                return None
+            rows = conn.execute(SELECT_PAGES, (row[0], start, stop if stop is not None else 2**62)).fetchall()
+        return [{"page_number": page_number, "content": _decompress(content)} for page_number, content in rows]
+
+    def search(self, document_name: str, query: str, limit: int = 10) -> Optional[List[Dict]]:
+        """
+        Pages of a document matching any word of `query`, best BM25 match first.
+
+        Returns:
+            List[Dict]: Up to `limit` {"page_number", "content"} pages, None if there is no such document
+        """
+        match = _fts_query(query)
+        with self._connection() as conn:
+            row = conn.execute(SELECT_ID, (document_name,)).fetchone()
+            if row is None:
+                return None
+            if not match:
+                return []
+            rows = conn.execute(SELECT_MATCHING_PAGES, (match, row[0], limit)).fetchall()
+        return [{"page_number": page_number, "content": _decompress(content)} for page_number, content in rows]
+
+    def get(self, document_name: str) -> Optional[Tuple[str, str]]:
+        """
+        (document_name, content) of the first document stored under that name, or None.
+
+        The content is rebuilt in the legacy `str(PDF2TXT(...))` format; use
+        `pages` or `search` to read only part of a document.
+        """
+        pages = self.pages(document_name)
+        if pages is None:
+            return None
+        return document_name, str(PDF2TXT(page_content=pages))
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def ainsert(self, document_name: str, pages: List[Dict]) -> int:
+        return await self._run(self.insert, document_name, pages)
+
+    async def anames(self) -> List[str]:
+        return await self._run(self.names)
+
+    async def apages(self, document_name: str, start: int = 0, stop: Optional[int] = None) -> Optional[List[Dict]]:
+        return await self._run(self.pages, document_name, start, stop)
+
+    async def asearch(self, document_name: str, query: str, limit: int = 10) -> Optional[List[Dict]]:
+        return await self._run(self.search, document_name, query, limit)
+
+    async def aget(self, document_name: str) -> Optional[Tuple[str, str]]:
+        return await self._run(self.get, document_name)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
@@ -0,0 +1,131 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFC with runs of whitespace collapsed, so trivially different copies share a cache entry."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, hot_size: int = 4096):
+        """
+        Persistent embedding cache keyed by model name and normalized-text hash.
+
+        Vectors are stored as float32 blobs in SQLite, with an in-memory LRU
+        tier of the `hot_size` most recently used entries in front of it.
+
+        Args:
+            path (str): SQLite database file (":memory:" for a throwaway cache)
+            hot_size (int): Number of vectors kept in memory
+        """
+        self.hot_size = hot_size
+        self._hot: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+        ''')
+        self._conn.commit()
+        self.hot_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _remember(self, key: tuple, vector: np.ndarray) -> None:
+        self._hot[key] = vector
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_size:
+            self._hot.popitem(last=False)
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up embeddings for several texts.
+
+        Returns:
+            List[Optional[List[float]]]: The cached vector of each text, None for misses
+        """
+        hashes = [text_hash(text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            missing = []
+            for h in hashes:
+                key = (model, h)
+                if key in self._hot:
+                    self._hot.move_to_end(key)
+                    found[h] = self._hot[key]
+                elif h not in missing:
+                    missing.append(h)
+            if missing:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *missing],
+                ).fetchall()
+                for h, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[h] = vector
+                    self._remember((model, h), vector)
+
+            results = []
+            for h in hashes:
+                vector = found.get(h)
+                if vector is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    if h in missing:
+                        self.disk_hits += 1
+                    else:
+                        self.hot_hits += 1
+                    results.append(vector.tolist())
+            return results
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        return self.get_many(model, [text])[0]
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]) -> None:
+        """Store embeddings for several texts."""
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                h = text_hash(text)
+                array = np.asarray(vector, dtype=np.float32)
+                self._remember((model, h), array)
+                rows.append((model, h, array.tobytes()))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def put(self, model: str, text: str, vector: List[float]) -> None:
+        self.put_many(model, [text], [vector])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stored = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            hits = self.hot_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "stored": stored,
+                "hot_entries": len(self._hot),
+                "hot_hits": self.hot_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else None,
+            }
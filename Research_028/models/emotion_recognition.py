@@ -4,106 +4,277 @@ import numpy as np
 from PIL import Image
 import pandas as pd
 import os
-from video_spliter import extract_frames_from_video
+import queue
+import threading
+import warnings
+from contextlib import contextmanager
+from pathlib import Path
+from video_spliter import extract_frames_from_video, iter_frames
+from model_registry import registry
+
+MODEL_DIR = os.path.join(Path(__file__).parent , "saved_model")
+
+# FaceMesh returns 468 landmarks, flattened as x_0, y_0, z_0, x_1, ...
+N_LANDMARKS = 468
+N_FEATURES = N_LANDMARKS * 3
+FEATURE_NAMES = [f'{axis}_{idx}' for idx in range(N_LANDMARKS) for axis in ('x', 'y', 'z')]
+
+
+def create_face_mesh():
+    return mp.solutions.face_mesh.FaceMesh(
+        static_image_mode=True,
+        max_num_faces=1,
+        min_detection_confidence=0.5
+    )
+
+
+def read_rgb(image):
+    """RGB numpy array from an image path or an array that already is one."""
+    if isinstance(image, np.ndarray):
+        return image
+    # Read image using PIL
+    with Image.open(image) as pil_image:
+        # Convert PIL image to RGB numpy array
+        return np.array(pil_image.convert('RGB'))
+
+
+def landmarks_to_vector(results, out):
+    """Copy the first face of a FaceMesh result into the float32 vector `out`.
+    
+    Returns:
+        bool: False if no face was detected
+    """
+    if not results.multi_face_landmarks:
+        return False
+    landmarks = results.multi_face_landmarks[0].landmark
+    values = np.fromiter(
+        (value for landmark in landmarks[:N_LANDMARKS] for value in (landmark.x, landmark.y, landmark.z)),
+        dtype=np.float32,
+        count=N_FEATURES
+    )
+    out[:] = values
+    return True
+
+
+class FaceMeshPool:
+    def __init__(self, size=None):
+        """Thread-safe pool of long-lived FaceMesh instances.
+        
+        Building a FaceMesh graph is expensive, so instances are created lazily
+        (up to `size`) and handed out to one thread at a time instead of being
+        rebuilt for every frame.
+        
+        Args:
+            size (int, optional): Maximum number of instances. Defaults to the
+                FACEMESH_POOL_SIZE environment variable or the CPU count.
+        """
+        self.size = size or int(os.getenv('FACEMESH_POOL_SIZE', os.cpu_count() or 1))
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def acquire(self):
+        """Borrow a FaceMesh instance, blocking if all of them are busy."""
+        face_mesh = self._take()
+        try:
+            yield face_mesh
+        finally:
+            self._idle.put(face_mesh)
+    
+    def _take(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return create_face_mesh()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get()
+    
+    def close(self):
+        """Close every idle instance."""
+        while True:
+            try:
+                face_mesh = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            face_mesh.close()
+            with self._lock:
+                self._created -= 1
+
+
+face_mesh_pool = FaceMeshPool()
+
 
 class EmotionPredictor:
-    def __init__(self, model_dir):
+    def __init__(self, model_dir, pool=None):
         """Initialize the emotion predictor with a trained model.
         
         Args:
             model_dir (str): Directory containing the saved model and scaler
+            pool (FaceMeshPool, optional): FaceMesh instances to use. Defaults to the process-wide pool
         """
         # Load the model and scaler
         self.model = joblib.load(os.path.join(model_dir, 'emotion_model.joblib'))
         self.scaler = joblib.load(os.path.join(model_dir, 'scaler.joblib'))
+        self.pool = pool or face_mesh_pool
+        # Map our x_0, y_0, z_0, x_1, ... layout onto the column order the scaler was fitted with
+        fitted_names = getattr(self.scaler, 'feature_names_in_', None)
+        if fitted_names is not None:
+            position = {name: idx for idx, name in enumerate(FEATURE_NAMES)}
+            self.feature_order = np.array([position[name] for name in fitted_names])
+        else:
+            self.feature_order = np.arange(N_FEATURES)
         
-    def extract_landmarks(self, image_path):
-        """Extract facial landmarks from an image."""
-        mp_face_mesh = mp.solutions.face_mesh
-        face_mesh = mp_face_mesh.FaceMesh(
-            static_image_mode=True,
-            max_num_faces=1,
-            min_detection_confidence=0.5
-        )
+    def extract_landmarks(self, image):
+        """Extract facial landmarks from an image.
         
-        try:
-            # Read image using PIL
-            image = Image.open(image_path)
-            if image is None:
-                raise ValueError(f"Failed to load image: {image_path}")
-                
-            # Convert PIL image to RGB numpy array
-            image_rgb = np.array(image.convert('RGB'))
+        Args:
+            image: Path to an image file or an RGB numpy frame
+        """
+        features = np.empty(N_FEATURES, dtype=np.float32)
+        if not self.extract_landmark_vector(image, features):
+            raise ValueError("No face detected in the image")
+        return pd.DataFrame([features], columns=FEATURE_NAMES)
+    
+    def extract_landmark_vector(self, image, out):
+        """Write the flattened landmarks of one image into `out`.
+        
+        Args:
+            image: Path to an image file or an RGB numpy frame
+            out (numpy.ndarray): float32 array of length N_FEATURES to fill
             
-            # Process image
+        Returns:
+            bool: False if no face was detected (`out` is left untouched)
+        """
+        image_rgb = read_rgb(image)
+        
+        # Process image, holding a pooled FaceMesh only for the inference itself
+        with self.pool.acquire() as face_mesh:
             results = face_mesh.process(image_rgb)
+        
+        return landmarks_to_vector(results, out)
+    
+    def extract_landmark_matrix(self, images):
+        """Extract landmarks for many images into one float32 matrix.
+        
+        The matrix is preallocated from `len(images)` when available (grown
+        otherwise), so there is no per-frame DataFrame or dict.
+        
+        Args:
+            images (iterable): Paths to image files or RGB numpy frames
             
-            if not results.multi_face_landmarks:
-                raise ValueError("No face detected in the image")
-            
-            # Extract landmarks
-            landmarks_dict = {}
-            for idx, landmark in enumerate(results.multi_face_landmarks[0].landmark):
-                landmarks_dict[f'x_{idx}'] = landmark.x
-                landmarks_dict[f'y_{idx}'] = landmark.y
-                landmarks_dict[f'z_{idx}'] = landmark.z
-            
-            return pd.DataFrame([landmarks_dict])
+        Returns:
+            tuple: (n_images, N_FEATURES) float32 features and a boolean mask of
+                the rows where a face was found
+        """
+        try:
+            capacity = max(len(images), 1)
+        except TypeError:
+            capacity = 256
+        features = np.zeros((capacity, N_FEATURES), dtype=np.float32)
+        found = np.zeros(capacity, dtype=bool)
+        
+        count = 0
+        for image in images:
+            if count == len(found):
+                features = np.concatenate([features, np.zeros_like(features)])
+                found = np.concatenate([found, np.zeros_like(found)])
+            try:
+                found[count] = self.extract_landmark_vector(image, features[count])
+            except Exception as e:
+                print(f"Error during landmark extraction: {str(e)}")
+            count += 1
+        return features[:count], found[:count]
+    
+    def classify(self, features):
+        """Classify a matrix of landmark vectors in one pass.
+        
+        Args:
+            features (numpy.ndarray): (n, N_FEATURES) landmark matrix
             
-        finally:
-            face_mesh.close()
+        Returns:
+            tuple: Predicted labels (n,) and class probabilities (n, n_classes)
+        """
+        if len(features) == 0:
+            return np.empty(0, dtype=self.model.classes_.dtype), np.empty((0, len(self.model.classes_)))
+        # Columns are already in training order, the names are only a fitting artefact
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            features_scaled = self.scaler.transform(features[:, self.feature_order])
+        emotion_probs = self.model.predict_proba(features_scaled)
+        return self.model.classes_[np.argmax(emotion_probs, axis=1)], emotion_probs
     
-    def predict(self, image_path):
+    def predict(self, image):
         """Predict emotion from an image.
         
         Args:
-            image_path (str): Path to the image file
+            image: Path to the image file or an RGB numpy frame
             
         Returns:
             dict: Predicted emotion and confidence scores
         """
-        try:
-            # Extract landmarks
-            landmarks_df = self.extract_landmarks(image_path)
-            
-            # Scale features
-            features_scaled = self.scaler.transform(landmarks_df)
-            
-            # Make prediction
-            emotion_pred = self.model.predict(features_scaled)[0]
-            emotion_probs = self.model.predict_proba(features_scaled)[0]
-            
-            # Get probability scores for all emotions
-            emotion_scores = {
-                emotion: prob 
-                for emotion, prob in zip(self.model.classes_, emotion_probs)
-            }
-            
-            return {
-                'predicted_emotion': emotion_pred,
-                'confidence_scores': emotion_scores
-            }
-            
-        except Exception as e:
-            print(f"Error during prediction: {str(e)}")
-            return None
+        return self.predict_batch([image])[0]['prediction']
     
-    def predict_batch(self, image_paths):
+    def predict_batch(self, images):
         """Predict emotions for multiple images.
         
+        Landmarks of all images are collected first, then scaled and classified
+        with a single transform / predict_proba call.
+        
         Args:
-            image_paths (list): List of paths to image files
+            images (iterable): Paths to image files or RGB numpy frames, e.g.
+                the `iter_frames` generator. Consumed one image at a time.
             
         Returns:
             list: List of prediction results
         """
-        results = []
-        for image_path in image_paths:
-            print(f"Processing: {image_path}")
-            result = self.predict(image_path)
-            results.append({
-                'image_path': image_path,
-                'prediction': result
-            })
+        features, found = self.extract_landmark_matrix(images)
+        if isinstance(images, (list, tuple)):
+            image_paths = [None if isinstance(image, np.ndarray) else image for image in images]
+        else:
+            image_paths = [None] * len(features)
+        labels, probs = self.classify(features[found])
+        
+        results = [
+            {'frame_index': index, 'image_path': image_path, 'prediction': None}
+            for index, image_path in enumerate(image_paths)
+        ]
+        for result, label, emotion_probs in zip((results[i] for i in np.flatnonzero(found)), labels, probs):
+            result['prediction'] = {
+                'predicted_emotion': label,
+                'confidence_scores': dict(zip(self.model.classes_, emotion_probs))
+            }
         return results
 
+
+def _register_emotion_predictor(model_dir):
+    name = f'emotion_predictor:{model_dir}'
+    if not registry.is_registered(name):
+        registry.register(
+            name,
+            lambda: EmotionPredictor(model_dir),
+            watch_paths=[os.path.join(model_dir, 'emotion_model.joblib'), os.path.join(model_dir, 'scaler.joblib')]
+        )
+    return name
+
+
+def get_emotion_predictor(model_dir=MODEL_DIR):
+    """Process-wide EmotionPredictor, reloaded when the model or scaler files change."""
+    return registry.get(_register_emotion_predictor(model_dir))
+
+
+def emotion_model_version(model_dir=MODEL_DIR):
+    """Changes whenever emotion_model.joblib or scaler.joblib change on disk."""
+    return registry.version(_register_emotion_predictor(model_dir))
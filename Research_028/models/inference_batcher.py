@@ -0,0 +1,140 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        process_batch: Callable[[List], List],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        name: str = "batcher",
+        history: int = 1000,
+    ):
+        """
+        Dynamic micro-batching queue in front of a batched inference function.
+
+        Concurrent `submit` calls are gathered for at most `max_wait_ms` (or until
+        `max_batch_size` items are waiting) and handed to `process_batch` in one
+        call on a single worker thread. Each caller gets its own result back
+        through a Future.
+
+        Args:
+            process_batch (Callable): Takes a list of items, returns a list of results in the same order
+            max_batch_size (int): Maximum number of items per batch
+            max_wait_ms (float): Maximum time the first item of a batch waits for company
+            name (str): Name of the worker thread
+            history (int): Number of latency samples kept per batch size
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._history = history
+        self._latencies: Dict[int, deque] = {}
+        self._batch_counts: Dict[int, int] = {}
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, item) -> Future:
+        """
+        Queue one item for inference.
+
+        Returns:
+            Future: Resolves to the result for this item
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    @staticmethod
+    def _take(batch: List, entry) -> None:
+        # Callers may cancel (e.g. a client disconnect) while waiting in the queue; drop those.
+        # Once running, the future can no longer be cancelled, so set_result cannot fail.
+        if entry[1].set_running_or_notify_cancel():
+            batch.append(entry)
+
+    def _collect(self) -> List:
+        batch = []
+        self._take(batch, self._queue.get())
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                self._take(batch, self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if not batch:
+                continue
+            items = [item for item, _, _ in batch]
+            try:
+                results = self.process_batch(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"Batch function returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            done = time.perf_counter()
+            for (_, future, submitted), result in zip(batch, results):
+                future.set_result(result)
+            self._record(len(batch), [done - submitted for _, _, submitted in batch])
+
+    def _record(self, batch_size: int, latencies: List[float]) -> None:
+        with self._stats_lock:
+            samples = self._latencies.setdefault(batch_size, deque(maxlen=self._history))
+            samples.extend(latencies)
+            self._batch_counts[batch_size] = self._batch_counts.get(batch_size, 0) + 1
+
+    def stats(self) -> Dict:
+        """
+        Per batch size: number of batches run and p50/p99 end-to-end latency.
+
+        Returns:
+            Dict: Configuration and latency statistics
+        """
+        with self._stats_lock:
+            per_size = {}
+            for batch_size in sorted(self._latencies):
+                values = sorted(self._latencies[batch_size])
+                per_size[batch_size] = {
+                    "batches": self._batch_counts[batch_size],
+                    "p50_ms": round(_percentile(values, 50) * 1000, 2),
+                    "p99_ms": round(_percentile(values, 99) * 1000, 2),
+                }
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": self._queue.qsize(),
+            "batch_sizes": per_size,
+        }
@@ -0,0 +1,139 @@
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class Job:
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.status = "queued"
+        self.stage = None
+        self.done = 0
+        self.total = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future: Optional[Future] = None
+
+    def report(self, done: int, total: Optional[int] = None, stage: Optional[str] = None) -> None:
+        """Progress callback handed to the job function."""
+        self.done = done
+        if total is not None:
+            self.total = total
+        if stage is not None:
+            self.stage = stage
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": {"done": self.done, "total": self.total},
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    def __init__(self, run: Callable, max_concurrent: int = 2, max_pending: int = 8, ttl: float = 3600.0):
+        """
+        Bounded background job queue.
+
+        At most `max_concurrent` jobs run at once on worker threads and at most
+        `max_pending` more wait for a slot; further submissions raise QueueFull
+        so callers can push back instead of piling up work. Finished jobs are
+        kept for `ttl` seconds for polling.
+
+        Args:
+            run (Callable): run(*args, progress=job.report) producing the job result
+            max_concurrent (int): Jobs processed in parallel
+            max_pending (int): Jobs allowed to wait for a free worker
+            ttl (float): Seconds a finished job stays available
+        """
+        self.run = run
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="job")
+        self._slots = threading.BoundedSemaphore(max_concurrent + max_pending)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, *args) -> Job:
+        """
+        Queue a job.
+
+        Raises:
+            QueueFull: If the running and waiting jobs are at capacity
+        """
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull(f"{self.max_concurrent + self.max_pending} jobs already queued or running")
+        self._purge()
+        job = Job(str(uuid.uuid4()))
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            job.future = self._executor.submit(self._execute, job, args)
+        except RuntimeError:
+            # Executor already shut down
+            with self._lock:
+                del self._jobs[job.id]
+            self._slots.release()
+            raise
+        # Release the slot however the job ends, including cancelled before it ever ran
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job
+
+    def _finish(self, job: Job, future: Future) -> None:
+        if future.cancelled():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+        self._slots.release()
+
+    def _execute(self, job: Job, args):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = self.run(*args, progress=job.report)
+            job.status = "done"
+            return job.result
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            raise
+        finally:
+            job.finished_at = time.time()
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_pending": self.max_pending,
+            "queued": sum(job.status == "queued" for job in jobs),
+            "running": sum(job.status == "running" for job in jobs),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
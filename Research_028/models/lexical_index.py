@@ -0,0 +1,167 @@
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Words, keeping the symbols of skills such as C++, C#, .NET and Node.js
+TOKEN_RE = re.compile(r"\.?[^\W_](?:[\w+#]|\.(?=[^\W_]))*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms of `text`."""
+    return TOKEN_RE.findall(text.lower())
+
+
+class LexicalIndex:
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        """
+        BM25 inverted index kept in SQLite, updated one document at a time.
+
+        Every document belongs to a named collection (e.g. "jobs" or
+        "resumes") that is scored independently. Term frequencies are stored
+        per document so adding, replacing or removing a document only
+        touches its own postings.
+
+        Args:
+            path (str): SQLite database file (":memory:" for a throwaway index)
+            k1 (float): BM25 term frequency saturation
+            b (float): BM25 document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS documents (
+                collection TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                PRIMARY KEY (collection, doc_id)
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                collection TEXT NOT NULL,
+                term TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (collection, term, doc_id)
+            );
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings (collection, doc_id);
+            CREATE TABLE IF NOT EXISTS collection_stats (
+                collection TEXT PRIMARY KEY,
+                n_docs INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            );
+        ''')
+        self._conn.commit()
+
+    def _remove(self, collection: str, doc_ids: List[str]) -> None:
+        for doc_id in doc_ids:
+            row = self._conn.execute(
+                'SELECT length FROM documents WHERE collection = ? AND doc_id = ?', (collection, doc_id)
+            ).fetchone()
+            if row is None:
+                continue
+            self._conn.execute('DELETE FROM postings WHERE collection = ? AND doc_id = ?', (collection, doc_id))
+            self._conn.execute('DELETE FROM documents WHERE collection = ? AND doc_id = ?', (collection, doc_id))
+            self._conn.execute(
+                'UPDATE collection_stats SET n_docs = n_docs - 1, total_length = total_length - ? WHERE collection = ?',
+                (row[0], collection)
+            )
+
+    def add_many(self, collection: str, documents: Iterable[Tuple[str, str]]) -> None:
+        """Index (doc_id, text) pairs, replacing earlier versions of the same ids."""
+        documents = list(documents)
+        with self._lock:
+            self._remove(collection, [doc_id for doc_id, _ in documents])
+            self._conn.execute(
+                'INSERT OR IGNORE INTO collection_stats (collection, n_docs, total_length) VALUES (?, 0, 0)',
+                (collection,)
+            )
+            for doc_id, text in documents:
+                terms = Counter(tokenize(text))
+                length = sum(terms.values())
+                self._conn.execute(
+                    'INSERT INTO documents (collection, doc_id, length) VALUES (?, ?, ?)', (collection, doc_id, length)
+                )
+                self._conn.executemany(
+                    'INSERT INTO postings (collection, term, doc_id, tf) VALUES (?, ?, ?, ?)',
+                    [(collection, term, doc_id, tf) for term, tf in terms.items()]
+                )
+                self._conn.execute(
+                    'UPDATE collection_stats SET n_docs = n_docs + 1, total_length = total_length + ? WHERE collection = ?',
+                    (length, collection)
+                )
+            self._conn.commit()
+
+    def add(self, collection: str, doc_id: str, text: str) -> None:
+        self.add_many(collection, [(doc_id, text)])
+
+    def remove(self, collection: str, doc_ids: List[str]) -> None:
+        with self._lock:
+            self._remove(collection, doc_ids)
+            self._conn.commit()
+
+    def contains(self, collection: str, doc_ids: List[str]) -> Set[str]:
+        """The subset of `doc_ids` that is indexed."""
+        if not doc_ids:
+            return set()
+        placeholders = ",".join("?" * len(doc_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT doc_id FROM documents WHERE collection = ? AND doc_id IN ({placeholders})',
+                [collection, *doc_ids]
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def count(self, collection: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT n_docs FROM collection_stats WHERE collection = ?', (collection,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def search(self, collection: str, query: str, n_results: int = 10,
+               allowed_ids: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Rank documents of a collection by BM25 against `query`.
+
+        Args:
+            collection (str): Collection to search
+            query (str): Query text, tokenized like the documents
+            n_results (int): Number of results to return
+            allowed_ids (Set[str], optional): Only rank these documents
+
+        Returns:
+            List[Tuple[str, float]]: (doc_id, score) pairs, best first
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        scores: Dict[str, float] = {}
+        with self._lock:
+            stats = self._conn.execute(
+                'SELECT n_docs, total_length FROM collection_stats WHERE collection = ?', (collection,)
+            ).fetchone()
+            if not stats or not stats[0]:
+                return []
+            n_docs, total_length = stats
+            avg_length = total_length / n_docs or 1
+            for term in terms:
+                rows = self._conn.execute(
+                    'SELECT p.doc_id, p.tf, d.length FROM postings p '
+                    'JOIN documents d ON d.collection = p.collection AND d.doc_id = p.doc_id '
+                    'WHERE p.collection = ? AND p.term = ?',
+                    (collection, term)
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+                for doc_id, tf, length in rows:
+                    if allowed_ids is not None and doc_id not in allowed_ids:
+                        continue
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
@@ -1,13 +1,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from controller_pdfreader import router as pdf_router
-from controller_questions import router as question_router 
-from controller_vectordb import router as vector_router
+from controller_pdfreader import router as pdf_router, document_store
+from controller_questions import router as question_router, question_bank
+from controller_vectordb import router as vector_router, db_manager as vector_db
 from controller_personality_prediction import router as personality_router
-from controller_emotion_detection import router as emotion_router
+from controller_emotion_detection import router as emotion_router, video_jobs
+from model_registry import registry
+from parallel_landmarks import landmark_extractor
+from pdf_reader import pdf_extractor
 import os 
 from pathlib import Path
 import shutil
+import threading
 
 
 
@@ -42,4 +46,23 @@ app.include_router(emotion_router, prefix="/recruitment-project/emotion")
 @app.on_event("startup")
 async def startup():
     delete_and_create_folder(path=dowloads_path)
-    delete_and_create_folder(path=temp_images)
\ No newline at end of file
+    delete_and_create_folder(path=temp_images)
+    # Load the ML models in the background so the first request doesn't pay for it.
+    # Set WARMUP_MODELS=0 to load them lazily instead.
+    if os.getenv("WARMUP_MODELS", "1") != "0":
+        threading.Thread(target=registry.warmup, daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    video_jobs.shutdown()
+    landmark_extractor.shutdown()
+    pdf_extractor.shutdown()
+    question_bank.shutdown()
+    document_store.close()
+    await vector_db.aclose()
+
+
+@app.get("/recruitment-project/models", tags=["Models"])
+async def model_stats():
+    return registry.stats()
@@ -0,0 +1,118 @@
+import os
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Source rows scored per matrix multiply, bounds the (rows x targets) score block in memory
+MATCH_BLOCK_ROWS = int(os.getenv("MATCH_BLOCK_ROWS", "1024"))
+MATCH_PAGE_SIZE = int(os.getenv("MATCH_PAGE_SIZE", "5000"))
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def load_vectors(collection, ids: Optional[List[str]] = None,
+                 page_size: int = MATCH_PAGE_SIZE) -> Tuple[List[str], np.ndarray, List[str]]:
+    """
+    Read stored embeddings from a Chroma collection.
+
+    Args:
+        collection: Chroma collection
+        ids (List[str], optional): Documents to read, every document when None
+        page_size (int): Documents fetched per Chroma call
+
+    Returns:
+        Tuple[List[str], np.ndarray, List[str]]: Found ids, their unit-length float32
+            vectors (one row each, in the order of `ids`) and the requested ids that are not stored
+    """
+    found_ids, vectors = [], []
+    if ids is None:
+        offset = 0
+        while True:
+            page = collection.get(limit=page_size, offset=offset, include=["embeddings"])
+            found_ids.extend(page['ids'])
+            vectors.extend(page['embeddings'])
+            if len(page['ids']) < page_size:
+                break
+            offset += page_size
+        missing = []
+    else:
+        by_id = {}
+        for start in range(0, len(ids), page_size):
+            page = collection.get(ids=ids[start:start + page_size], include=["embeddings"])
+            by_id.update(zip(page['ids'], page['embeddings']))
+        missing = [doc_id for doc_id in ids if doc_id not in by_id]
+        found_ids = [doc_id for doc_id in dict.fromkeys(ids) if doc_id in by_id]
+        vectors = [by_id[doc_id] for doc_id in found_ids]
+    if not vectors:
+        return found_ids, np.zeros((0, 0), dtype=np.float32), missing
+    return found_ids, _normalize(np.asarray(vectors, dtype=np.float32)), missing
+
+
+def top_k(sources: np.ndarray, targets: np.ndarray, k: int,
+          block_rows: int = MATCH_BLOCK_ROWS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Best `k` targets of every source row by cosine similarity.
+
+    Sources are scored against all targets with one matrix multiply per
+    block of `block_rows` rows; `argpartition` selects the k best columns
+    of each row and only those are sorted.
+
+    Args:
+        sources (np.ndarray): (n, d) unit-length vectors
+        targets (np.ndarray): (m, d) unit-length vectors
+        k (int): Matches per source
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (n, k) target indices and (n, k) similarities, best first
+    """
+    k = min(k, len(targets))
+    indices = np.empty((len(sources), k), dtype=np.int64)
+    scores = np.empty((len(sources), k), dtype=np.float32)
+    if k == 0:
+        return indices, scores
+    for start in range(0, len(sources), block_rows):
+        block = sources[start:start + block_rows] @ targets.T
+        if k < block.shape[1]:
+            best = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        else:
+            best = np.broadcast_to(np.arange(k), (len(block), k))
+        best_scores = np.take_along_axis(block, best, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        indices[start:start + len(block)] = np.take_along_axis(best, order, axis=1)
+        scores[start:start + len(block)] = np.take_along_axis(best_scores, order, axis=1)
+    return indices, scores
+
+
+def match(source_collection, target_collection, source_ids: Optional[List[str]] = None,
+          target_ids: Optional[List[str]] = None, k: int = 10) -> Dict:
+    """
+    Match stored documents of one collection against another without embedding anything.
+
+    Args:
+        source_collection: Collection of the documents to find matches for
+        target_collection: Collection searched for matches
+        source_ids (List[str], optional): Documents to match, all of them when None
+        target_ids (List[str], optional): Candidates to consider, all of them when None
+        k (int): Matches per document, at least 1
+
+    Returns:
+        Dict: {'matches': {source_id: [{'id', 'score', 'distance'}, ...]}, 'missing': [...]}
+            where score is the cosine similarity and distance the squared L2 distance
+            between unit vectors (2 - 2 * score), comparable to search results
+    """
+    if k < 1:
+        raise ValueError("k must be at least 1")
+    sources, source_vectors, missing_sources = load_vectors(source_collection, source_ids)
+    targets, target_vectors, missing_targets = load_vectors(target_collection, target_ids)
+    matches = {source_id: [] for source_id in sources}
+    if sources and targets:
+        indices, scores = top_k(source_vectors, target_vectors, k)
+        for source_id, row_indices, row_scores in zip(sources, indices, scores):
+            matches[source_id] = [
+                {'id': targets[index], 'score': float(score), 'distance': float(2 - 2 * score)}
+                for index, score in zip(row_indices, row_scores)
+            ]
+    return {'matches': matches, 'missing': missing_sources + missing_targets}
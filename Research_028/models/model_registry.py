@@ -0,0 +1,235 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+def _rss_bytes() -> int:
+    """Resident set size of the current process in bytes (0 if unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is a high-water mark (KB on Linux), good enough as a fallback
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, AttributeError):
+        return 0
+
+
+def _tensor_bytes(obj) -> Optional[int]:
+    """Parameter + buffer size for torch modules, None for anything else."""
+    if not (hasattr(obj, "parameters") and hasattr(obj, "buffers")):
+        return None
+    try:
+        total = 0
+        for tensor in list(obj.parameters()) + list(obj.buffers()):
+            total += tensor.numel() * tensor.element_size()
+        return total
+    except Exception:
+        return None
+
+
+class _Entry:
+    def __init__(self, name, loader, watch_paths, warmup, check_interval):
+        self.name = name
+        self.loader = loader
+        self.watch_paths = list(watch_paths)
+        self.warmup = warmup
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.obj = None
+        self.loaded = False
+        self.mtimes = {}
+        self.last_check = 0.0
+        self.load_count = 0
+        self.load_time = None
+        self.loaded_at = None
+        self.warmup_time = None
+        self.rss_delta = None
+        self.tensor_bytes = None
+        self.error = None
+
+
+class ModelRegistry:
+    def __init__(self):
+        """
+        Process-wide registry of ML models.
+
+        Models are registered with a loader callable and loaded once, either
+        eagerly through `warmup` or lazily on first `get`. Every caller shares
+        the same instance. If any of the watched files change on disk the
+        model is reloaded on the next `get` and swapped in atomically.
+        """
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._entries
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], object],
+        watch_paths: Optional[List[str]] = None,
+        warmup: Optional[Callable[[object], None]] = None,
+        check_interval: float = 5.0,
+    ) -> None:
+        """
+        Register a model.
+
+        Args:
+            name (str): Registry key
+            loader (Callable): Zero-argument function returning the loaded model
+            watch_paths (List[str]): Files whose modification triggers a reload
+            warmup (Callable): Optional function run on the model after loading
+            check_interval (float): Minimum seconds between file change checks
+        """
+        with self._lock:
+            self._entries[name] = _Entry(name, loader, watch_paths or [], warmup, check_interval)
+
+    def _mtimes(self, entry: _Entry) -> Dict[str, float]:
+        mtimes = {}
+        for path in entry.watch_paths:
+            try:
+                mtimes[path] = os.path.getmtime(path)
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def _load(self, entry: _Entry) -> None:
+        mtimes = self._mtimes(entry)
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        obj = entry.loader()
+        load_time = time.perf_counter() - start
+        rss_delta = max(_rss_bytes() - rss_before, 0)
+
+        warmup_time = None
+        if entry.warmup is not None:
+            start = time.perf_counter()
+            entry.warmup(obj)
+            warmup_time = time.perf_counter() - start
+
+        # Swap only once the new object is fully loaded and warmed up
+        entry.obj = obj
+        entry.loaded = True
+        entry.mtimes = mtimes
+        entry.last_check = time.monotonic()
+        entry.load_count += 1
+        entry.load_time = load_time
+        entry.loaded_at = time.time()
+        entry.warmup_time = warmup_time
+        entry.rss_delta = rss_delta
+        entry.tensor_bytes = _tensor_bytes(obj)
+        entry.error = None
+        print(f"Loaded model '{entry.name}' in {load_time:.2f}s (+{rss_delta / 2**20:.1f} MB RSS)")
+
+    def _entry(self, name: str) -> _Entry:
+        try:
+            return self._entries[name]
+        except KeyError:
+            raise KeyError(f"Model '{name}' is not registered")
+
+    def _is_stale(self, entry: _Entry) -> bool:
+        if not self._check_due(entry):
+            return False
+        entry.last_check = time.monotonic()
+        return self._mtimes(entry) != entry.mtimes
+
+    def _check_due(self, entry: _Entry) -> bool:
+        return bool(entry.watch_paths) and time.monotonic() - entry.last_check >= entry.check_interval
+
+    def get(self, name: str):
+        """
+        Return the shared instance of a model, loading or hot-reloading it if needed.
+
+        Args:
+            name (str): Registry key
+
+        Returns:
+            object: The loaded model
+        """
+        entry = self._entry(name)
+        # Fast path without taking the lock once the model is loaded
+        if entry.loaded and not self._check_due(entry):
+            return entry.obj
+        with entry.lock:
+            if not entry.loaded:
+                self._load_or_record(entry)
+            elif self._is_stale(entry):
+                print(f"Model files for '{name}' changed on disk, reloading")
+                try:
+                    self._load(entry)
+                except Exception as e:
+                    # Keep serving the previous version if the new files are broken
+                    entry.error = str(e)
+                    print(f"Reload of '{name}' failed, keeping previous version: {e}")
+            return entry.obj
+
+    def _load_or_record(self, entry: _Entry) -> None:
+        try:
+            self._load(entry)
+        except Exception as e:
+            entry.error = str(e)
+            raise
+
+    def reload(self, name: str):
+        """Force a reload of a model and return the new instance."""
+        entry = self._entry(name)
+        with entry.lock:
+            self._load_or_record(entry)
+            return entry.obj
+
+    def version(self, name: str) -> str:
+        """
+        Identifier of the currently loaded version, derived from the watched files.
+
+        Changes whenever a watched file changes, so it can be used as a cache key.
+        """
+        entry = self._entry(name)
+        self.get(name)
+        parts = [name] if entry.watch_paths else [name, str(entry.load_count)]
+        for path in entry.watch_paths:
+            parts.append(f"{os.path.basename(path)}:{entry.mtimes.get(path)}")
+        return "|".join(parts)
+
+    def warmup(self, names: Optional[List[str]] = None) -> None:
+        """
+        Load (and warm up) registered models ahead of the first request.
+
+        Args:
+            names (List[str]): Models to load, defaults to every registered model
+        """
+        for name in names or list(self._entries):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Warm-up of model '{name}' failed: {e}")
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Load time and memory usage per model.
+
+        Returns:
+            Dict[str, Dict]: Per-model statistics
+        """
+        return {
+            name: {
+                "loaded": entry.loaded,
+                "load_count": entry.load_count,
+                "load_time_s": entry.load_time,
+                "warmup_time_s": entry.warmup_time,
+                "loaded_at": entry.loaded_at,
+                "rss_delta_bytes": entry.rss_delta,
+                "tensor_bytes": entry.tensor_bytes,
+                "watch_paths": entry.watch_paths,
+                "error": entry.error,
+            }
+            for name, entry in self._entries.items()
+        }
+
+
+registry = ModelRegistry()
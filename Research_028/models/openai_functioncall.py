@@ -1,5 +1,6 @@
 from openai import OpenAI 
 from dotenv import load_dotenv
+import hashlib
 import os
 from pydantic import BaseModel , Field
 from typing import List 
@@ -13,7 +14,11 @@ except FileNotFoundError:
 
 
 api_key = os.environ.get("OPENAI_KEY")
-client = OpenAI(api_key=api_key)
+# Point OPENAI_BASE_URL at any OpenAI compatible server (e.g. a local fake for tests)
+client = OpenAI(api_key=api_key, base_url=os.environ.get("OPENAI_BASE_URL") or None)
+QUESTION_MODEL = os.environ.get("QUESTION_MODEL", "gpt-4o-mini")
+# Questions generated by another model or prompt are not interchangeable, stored question banks are keyed by this
+QUESTION_GENERATOR_VERSION = f"{QUESTION_MODEL}|prompt={hashlib.sha256(GENERATE_QUESTION.encode('utf-8')).hexdigest()[:12]}"
 
 class AnswerChoices(BaseModel):
     answer_choice:str = Field(description="One of the multiple choieces")
@@ -34,7 +39,7 @@ class Multichoice(BaseModel):
 def question_generation(context , difficulty_level):
     
     completion = client.beta.chat.completions.parse(
-            model="gpt-4o-mini", 
+            model=QUESTION_MODEL, 
             messages=[
                 {"role": "system", "content": GENERATE_QUESTION ,
                 "role": "user", "content":  f"{context}, Difficulty Level : {difficulty_level}"}
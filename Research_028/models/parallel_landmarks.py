@@ -0,0 +1,110 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from moviepy.editor import VideoFileClip
+from emotion_recognition import create_face_mesh, landmarks_to_vector
+from video_spliter import VideoFrames, count_frames
+from adaptive_sampling import AdaptiveSampler, merge_tracks
+
+# One FaceMesh per worker process, created by the pool initializer
+_worker_face_mesh = None
+
+
+def _init_worker():
+    global _worker_face_mesh
+    _worker_face_mesh = create_face_mesh()
+
+
+def _worker_extract(frame, out):
+    return landmarks_to_vector(_worker_face_mesh.process(frame), out)
+
+
+def _extract_range(video_path, fps, slot_start, slot_stop, n_slots, sampler):
+    """Decode slots [slot_start, slot_stop) of a video and sample their landmarks (runs in a worker)."""
+    decode_fps = sampler.decode_fps(fps)
+    video = VideoFileClip(video_path, audio=False)
+    n_decoded = count_frames(video.duration, decode_fps)
+    try:
+        # Consecutive get_frame calls read forward, only the first one seeks
+        frames = (
+            video.get_frame(index / decode_fps)
+            for index in range(slot_start * sampler.boost, min(slot_stop * sampler.boost, n_decoded))
+        )
+        track = sampler.run(frames, _worker_extract, n_slots, slot_offset=slot_start, capacity=slot_stop - slot_start)
+    finally:
+        video.close()
+    return slot_start, track
+
+
+class ParallelLandmarkExtractor:
+    def __init__(self, workers=None, chunk_size=None):
+        """
+        Extract landmarks of a video on a pool of worker processes.
+
+        The video is split into ranges of `chunk_size` output frames; every
+        worker decodes its own ranges with its own FaceMesh and results are
+        merged back in frame order.
+
+        Args:
+            workers (int, optional): Worker processes. Defaults to EMOTION_WORKERS or the CPU count
+            chunk_size (int, optional): Frames per task. Defaults to EMOTION_CHUNK_FRAMES or 50
+        """
+        self.workers = workers or int(os.getenv("EMOTION_WORKERS", os.cpu_count() or 1))
+        self.chunk_size = chunk_size or int(os.getenv("EMOTION_CHUNK_FRAMES", "50"))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: forking a process that already runs torch/mediapipe threads can deadlock
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def extract(self, video_path, fps, sampler=None, progress=None):
+        """
+        Landmarks of a whole video sampled at `fps`.
+
+        Args:
+            video_path (str): Path to the video file
+            fps (float): Output frames per second
+            sampler (AdaptiveSampler, optional): Sampling policy, applied per chunk. Defaults to fixed sampling
+            progress (Callable, optional): Called as progress(frames_done, frames_total) as chunks finish
+
+        Returns:
+            LandmarkTrack: Same as `adaptive_sampling.extract_track` in a single process
+        """
+        sampler = sampler or AdaptiveSampler.fixed()
+        frames = VideoFrames(video_path, fps=fps)
+        n_slots = len(frames)
+        frames.close()
+
+        pool = self._pool()
+        futures = [
+            pool.submit(_extract_range, video_path, fps, start, min(start + self.chunk_size, n_slots), n_slots, sampler)
+            for start in range(0, n_slots, self.chunk_size)
+        ]
+        tracks = {}
+        done = 0
+        for future in as_completed(futures):
+            start, track = future.result()
+            tracks[start] = track
+            done += min(self.chunk_size, n_slots - start)
+            if progress is not None:
+                progress(done, n_slots)
+        # Merge back in frame order whatever order the chunks finished in
+        return merge_tracks([tracks[start] for start in sorted(tracks)], n_slots)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+landmark_extractor = ParallelLandmarkExtractor()
@@ -1,19 +1,113 @@
-from PyPDF2 import PdfReader
-from typing import NamedTuple
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PyPDF2 import PdfReader, __version__ as pypdf2_version
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Union
 from collections import namedtuple
 
+PDF2TXT = namedtuple('PDF2TXT' , ['page_content'])
+# Part of cached extraction keys, bump the suffix when the extracted text changes
+EXTRACTOR_VERSION = f"pypdf2-{pypdf2_version}-1"
 
-def pdf_text_extractor(pdf_file_path:str )->NamedTuple:
-    PDF2TXT = namedtuple('PDF2TXT' , ['page_content'])
-    reader = PdfReader(pdf_file_path)
-    page_content = []
-    number_of_pages = len(reader.pages)
-    for i in range(number_of_pages):
-        page = reader.pages[i]
-        text = page.extract_text()
-        page_content.append({
+
+def _open(pdf_file: Union[str, bytes, BinaryIO]) -> PdfReader:
+    if isinstance(pdf_file, (bytes, bytearray, memoryview)):
+        pdf_file = io.BytesIO(pdf_file)
+    return PdfReader(pdf_file)
+
+
+def _extract_pages(reader: PdfReader, start: int, stop: int) -> Iterator[Dict]:
+    for i in range(start, stop):
+        yield {
             "page_number":i,
-            "content" : text
-        })
+            "content" : reader.pages[i].extract_text()
+        }
+
+
+def _extract_range(data: bytes, start: int, stop: int) -> List[Dict]:
+    """Text of pages [start, stop) of a PDF (runs in a worker)."""
+    return list(_extract_pages(_open(data), start, stop))
+
+
+def pdf_text_extractor(pdf_file_path: Union[str, bytes, BinaryIO])->NamedTuple:
+    reader = _open(pdf_file_path)
+    page_content = list(_extract_pages(reader, 0, len(reader.pages)))
     pdftext =  PDF2TXT(page_content=page_content)
-    return pdftext 
\ No newline at end of file
+    return pdftext
+
+
+class ParallelPdfExtractor:
+    def __init__(self, workers=None, pages_per_task=None):
+        """
+        Extract the text of PDFs on a pool of worker processes.
+
+        Documents are split into ranges of `pages_per_task` pages; every
+        worker parses its own copy of the document and extracts its ranges.
+        Documents that fit in a single range are extracted in the calling
+        process, where starting a task would cost more than it saves.
+
+        Args:
+            workers (int, optional): Worker processes. Defaults to PDF_WORKERS or the CPU count
+            pages_per_task (int, optional): Pages per task. Defaults to PDF_PAGES_PER_TASK or 20
+        """
+        self.workers = workers or int(os.getenv("PDF_WORKERS", os.cpu_count() or 1))
+        self.pages_per_task = pages_per_task or int(os.getenv("PDF_PAGES_PER_TASK", "20"))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: forking a process that already runs torch/mediapipe threads can deadlock
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def iter_pages(self, data: bytes) -> Iterator[Dict]:
+        """
+        Pages of a PDF as soon as they are extracted.
+
+        Pages of one range come in order, but ranges are yielded in the
+        order they finish, so use each page's "page_number" to place it.
+
+        Args:
+            data (bytes): Content of the PDF file
+
+        Yields:
+            Dict: {"page_number", "content"} of every page
+        """
+        reader = _open(data)
+        n_pages = len(reader.pages)
+        if self.workers <= 1 or n_pages <= self.pages_per_task:
+            yield from _extract_pages(reader, 0, n_pages)
+            return
+        pool = self._pool()
+        futures = [
+            pool.submit(_extract_range, data, start, min(start + self.pages_per_task, n_pages))
+            for start in range(0, n_pages, self.pages_per_task)
+        ]
+        try:
+            for future in as_completed(futures):
+                yield from future.result()
+        finally:
+            # The consumer went away (e.g. a client disconnected from a stream)
+            for future in futures:
+                future.cancel()
+
+    def extract(self, data: bytes) -> NamedTuple:
+        """Same as `pdf_text_extractor`, with the pages extracted in parallel."""
+        page_content = sorted(self.iter_pages(data), key=lambda page: page["page_number"])
+        return PDF2TXT(page_content=page_content)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+pdf_extractor = ParallelPdfExtractor()
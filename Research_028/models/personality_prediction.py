@@ -1,80 +1,157 @@
+import asyncio
 import pandas as pd
 import numpy as np
 import torch
 import joblib
-from transformers import AutoTokenizer, AutoModel
-from torch.utils.data import Dataset, DataLoader
+from transformers import AutoTokenizer
 import os
 from pathlib import Path
+from model_registry import registry
+from inference_batcher import MicroBatcher
+from bert_backends import OnnxBertModel, load_bert
 
-class TextDataset(Dataset):
-    def __init__(self, texts, tokenizer, max_length=128):
-        self.texts = texts
-        self.tokenizer = tokenizer
-        self.max_length = max_length
+MODEL_DIR = os.path.join(Path(__file__).parent , "personality_model")
+BERT_MODEL_NAME = 'bert-base-uncased'
+# torch | torch-int8 | onnx | onnx-int8, see bert_backends.load_bert
+BERT_BACKEND = os.getenv('PERSONALITY_BACKEND', 'torch')
 
-    def __len__(self):
-        return len(self.texts)
+def get_bert_embeddings(texts, model, tokenizer, device=None, batch_size=32, max_length=128):
+    """CLS embeddings for a list of texts.
+
+    Texts are tokenized and run through BERT in batches, each padded only to its
+    longest member; the attention mask keeps the CLS output identical to padding
+    every text to `max_length`. `model` is either a torch module (run on `device`,
+    default: wherever the model already is) or an `OnnxBertModel`.
+    """
+    if isinstance(model, OnnxBertModel):
+        return _onnx_embeddings(texts, model, tokenizer, batch_size, max_length)
 
-    def __getitem__(self, idx):
-        text = str(self.texts[idx])
-        encoding = self.tokenizer(
-            text,
-            add_special_tokens=True,
-            max_length=self.max_length,
-            padding='max_length',
-            truncation=True,
-            return_tensors='pt'
-        )
-        return {
-            'input_ids': encoding['input_ids'].flatten(),
-            'attention_mask': encoding['attention_mask'].flatten()
-        }
-
-def get_bert_embeddings(texts, model, tokenizer, device='cuda' if torch.cuda.is_available() else 'cpu'):
-    dataset = TextDataset(texts, tokenizer)
-    dataloader = DataLoader(dataset, batch_size=1)  # batch_size=1 for single inference
-    
     embeddings = []
-    model.to(device)
+    if device is None:
+        device = next(model.parameters()).device
+    else:
+        model.to(device)
     model.eval()
 
     with torch.no_grad():
-        for batch in dataloader:
-            input_ids = batch['input_ids'].to(device)
-            attention_mask = batch['attention_mask'].to(device)
+        for start in range(0, len(texts), batch_size):
+            encoding = tokenizer(
+                [str(text) for text in texts[start:start + batch_size]],
+                add_special_tokens=True,
+                max_length=max_length,
+                padding='longest',
+                truncation=True,
+                return_tensors='pt'
+            )
+            input_ids = encoding['input_ids'].to(device)
+            attention_mask = encoding['attention_mask'].to(device)
             outputs = model(input_ids=input_ids, attention_mask=attention_mask)
             embeddings.append(outputs.last_hidden_state[:, 0, :].cpu().numpy())
 
     return np.vstack(embeddings)
 
-def predict_personality(text, model_dir=os.path.join(Path(__file__).parent , "personality_model")):
+
+def _onnx_embeddings(texts, model, tokenizer, batch_size, max_length):
+    embeddings = []
+    for start in range(0, len(texts), batch_size):
+        encoding = tokenizer(
+            [str(text) for text in texts[start:start + batch_size]],
+            add_special_tokens=True,
+            max_length=max_length,
+            padding='longest',
+            truncation=True,
+            return_tensors='np'
+        )
+        embeddings.append(model.cls_embeddings(encoding['input_ids'], encoding['attention_mask']))
+    return np.vstack(embeddings)
+
+
+def _load_bert_model():
+    return load_bert(BERT_BACKEND, BERT_MODEL_NAME, onnx_dir=MODEL_DIR)
+
+
+def _warmup_bert(model):
+    # One dummy forward pass so the first real request does not pay for lazy init
+    tokenizer = registry.get('bert_tokenizer')
+    get_bert_embeddings(["warm up"], model, tokenizer)
+
+
+def register_personality_models(model_dir=MODEL_DIR):
+    """Register the personality models in the shared registry (idempotent).
+
+    Returns:
+        tuple: Registry names of the classifier and label encoder
+    """
+    classifier_name = f'personality_classifier:{model_dir}'
+    encoder_name = f'personality_label_encoder:{model_dir}'
+    if not registry.is_registered(classifier_name):
+        classifier_path = os.path.join(model_dir, 'classifier.joblib')
+        encoder_path = os.path.join(model_dir, 'label_encoder.joblib')
+        registry.register(classifier_name, lambda: joblib.load(classifier_path), watch_paths=[classifier_path])
+        registry.register(encoder_name, lambda: joblib.load(encoder_path), watch_paths=[encoder_path])
+    return classifier_name, encoder_name
+
+
+registry.register('bert_tokenizer', lambda: AutoTokenizer.from_pretrained(BERT_MODEL_NAME))
+registry.register('bert_model', _load_bert_model, warmup=_warmup_bert)
+register_personality_models()
+
+
+def _format_predictions(probs, label_encoder):
+    # Highest probability first
+    order = np.argsort(probs)[::-1]
+    labels = label_encoder.inverse_transform(order)
+    return {label: float(probs[idx]) for idx, label in zip(order, labels)}
+
+
+def predict_personality_batch(texts, model_dir=MODEL_DIR):
+    """Predict personality probabilities for many texts at once.
+
+    Args:
+        texts (list): Input texts
+        model_dir (str): Directory containing the classifier and label encoder
+
+    Returns:
+        list: One {personality_type: probability} dict per text, in input order
+    """
+    classifier_name, encoder_name = register_personality_models(model_dir)
+    classifier = registry.get(classifier_name)
+    label_encoder = registry.get(encoder_name)
+    tokenizer = registry.get('bert_tokenizer')
+    bert_model = registry.get('bert_model')
+
+    embeddings = get_bert_embeddings(list(texts), bert_model, tokenizer)
+    probs = classifier.predict_proba(embeddings)
+    return [_format_predictions(row, label_encoder) for row in probs]
+
+
+# Requests arriving within the same short window share one BERT forward pass
+personality_batcher = MicroBatcher(
+    predict_personality_batch,
+    max_batch_size=int(os.getenv('PERSONALITY_MAX_BATCH_SIZE', '16')),
+    max_wait_ms=float(os.getenv('PERSONALITY_MAX_WAIT_MS', '10')),
+    name='personality-batcher',
+)
+
+
+def predict_personality(text, model_dir=MODEL_DIR):
     
     try:
-        # Load saved components
-        classifier = joblib.load(os.path.join(model_dir, 'classifier.joblib'))
-        label_encoder = joblib.load(os.path.join(model_dir, 'label_encoder.joblib'))
-        
-        # Load BERT model and tokenizer
-        tokenizer = AutoTokenizer.from_pretrained('bert-base-uncased')
-        bert_model = AutoModel.from_pretrained('bert-base-uncased')
-        
-        # Get embeddings for the input text
-        embedding = get_bert_embeddings([text], bert_model, tokenizer)
-        
-        # Get prediction probabilities
-        probs = classifier.predict_proba(embedding)[0]
-        
-        # Create predictions dictionary
-        predictions = {}
-        for idx in np.argsort(probs)[::-1]:
-            personality_type = label_encoder.inverse_transform([idx])[0]
-            probability = float(probs[idx])  # Convert to float for JSON serialization
-            predictions[personality_type] = probability
+        if model_dir == MODEL_DIR:
+            predictions = personality_batcher.submit(text).result()
+        else:
+            predictions = predict_personality_batch([text], model_dir)[0]
         print("this is prediction" , predictions)
         return predictions
         
     except Exception as e:
         return {"error": f"Prediction failed: {str(e)}"}
-    
 
+
+async def predict_personality_async(text):
+    """Same as `predict_personality` but awaits the batcher instead of blocking the event loop."""
+    try:
+        predictions = await asyncio.wrap_future(personality_batcher.submit(text))
+        return predictions
+    except Exception as e:
+        return {"error": f"Prediction failed: {str(e)}"}
@@ -0,0 +1,194 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+
+QUESTION_BANK_MIN_FRESH = int(os.getenv("QUESTION_BANK_MIN_FRESH", "20"))
+QUESTION_BANK_MAX = int(os.getenv("QUESTION_BANK_MAX", "200"))
+QUESTION_BANK_WORKERS = int(os.getenv("QUESTION_BANK_WORKERS", "1"))
+
+# scope identifies the part of the document the questions come from ("" for all of it)
+BankKey = namedtuple('BankKey', ['document_name', 'difficulty', 'scope', 'generator_version'])
+
+
+class QuestionBank:
+    def __init__(self, path: str, generate: Callable[[BankKey], List[Dict]],
+                 min_fresh: int = QUESTION_BANK_MIN_FRESH, max_questions: int = QUESTION_BANK_MAX,
+                 workers: int = QUESTION_BANK_WORKERS):
+        """
+        Pre-generated questions per (document, difficulty, scope, generator version).
+
+        Requests are answered by sampling stored questions, least served
+        first. When fewer than `min_fresh` questions of a key were never
+        served, a refill generating one more batch is queued on a background
+        thread, until the key holds `max_questions`. Only a key with fewer
+        questions than a request asks for waits for a generation.
+
+        Args:
+            path (str): SQLite database file, shared with the document store
+            generate (Callable): generate(key) returning a batch of question dicts for that key
+            min_fresh (int): Unserved questions below which a key is refilled
+            max_questions (int): Questions kept per key
+            workers (int): Background refill threads
+        """
+        self.generate = generate
+        self.min_fresh = min_fresh
+        self.max_questions = max_questions
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self.refill_errors = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+        # Serializes generations per key, so concurrent first requests share one. Entries are
+        # [lock, threads holding or waiting for it] and go away with their last user
+        self._key_locks: Dict[BankKey, list] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="question-refill")
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS question_bank (
+                id INTEGER PRIMARY KEY,
+                document_name TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                generator_version TEXT NOT NULL,
+                question TEXT NOT NULL,
+                served INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS question_bank_key '
+            'ON question_bank (document_name, difficulty, scope, generator_version, served)'
+        )
+        self._conn.commit()
+
+    def add(self, key: BankKey, questions: List[Dict]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO question_bank (document_name, difficulty, scope, generator_version, question, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(*key, json.dumps(question), now) for question in questions]
+            )
+            self._conn.commit()
+
+    def counts(self, key: BankKey) -> Dict:
+        with self._lock:
+            total, fresh = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(served = 0), 0) FROM question_bank '
+                'WHERE document_name = ? AND difficulty = ? AND scope = ? AND generator_version = ?',
+                key
+            ).fetchone()
+        return {"total": total, "fresh": fresh}
+
+    def sample(self, key: BankKey, n: int) -> List[Dict]:
+        """Up to `n` stored questions, least served first and random among equals; marks them served."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, question FROM question_bank '
+                'WHERE document_name = ? AND difficulty = ? AND scope = ? AND generator_version = ? '
+                'ORDER BY served, RANDOM() LIMIT ?',
+                (*key, n)
+            ).fetchall()
+            self._conn.executemany(
+                'UPDATE question_bank SET served = served + 1 WHERE id = ?', [(row[0],) for row in rows]
+            )
+            self._conn.commit()
+        return [json.loads(row[1]) for row in rows]
+
+    @contextmanager
+    def _key_lock(self, key: BankKey) -> Iterator[None]:
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+
+    def get(self, key: BankKey, n: int) -> List[Dict]:
+        """
+        `n` questions for a key, generating a batch first only if the bank holds fewer.
+
+        Blocks while generating, call it off the event loop.
+        """
+        generated = False
+        if self.counts(key)["total"] < n:
+            with self._key_lock(key):
+                # Another request (or a refill) may have filled the key while this one waited
+                if self.counts(key)["total"] < n:
+                    self.add(key, self.generate(key))
+                    generated = True
+        with self._lock:
+            if generated:
+                self.misses += 1
+            else:
+                self.hits += 1
+        questions = self.sample(key, n)
+        self.refill_if_low(key)
+        return questions
+
+    def refill_if_low(self, key: BankKey) -> bool:
+        """Queue a background refill of `key` if it is running low, returns whether one was queued."""
+        counts = self.counts(key)
+        if counts["fresh"] >= self.min_fresh or counts["total"] >= self.max_questions:
+            return False
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+        try:
+            self._executor.submit(self._refill, key)
+        except RuntimeError:
+            # Executor shut down
+            with self._lock:
+                self._pending.discard(key)
+            return False
+        return True
+
+    def _refill(self, key: BankKey) -> None:
+        try:
+            with self._key_lock(key):
+                questions = self.generate(key)
+                self.add(key, questions)
+            with self._lock:
+                self.refills += 1
+        except Exception as e:
+            print(f"Question bank refill failed for {key.document_name} ({key.difficulty}): {e}")
+            with self._lock:
+                self.refill_errors += 1
+            return
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+        # Keep going until the key has enough fresh questions (or hits the cap)
+        if questions:
+            self.refill_if_low(key)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            questions = self._conn.execute('SELECT COUNT(*) FROM question_bank').fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "questions": questions,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "refills": self.refills,
+                "refill_errors": self.refill_errors,
+                "refills_pending": len(self._pending),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,40 +1,272 @@
 import requests
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+
+class S3Downloader:
+    def __init__(self, session=None, chunk_size=1024 * 1024, part_size=8 * 1024 * 1024, max_parts=4,
+                 parallel_threshold=32 * 1024 * 1024, retries=3, backoff=0.5, timeout=(5, 60)):
+        """
+        HTTP downloader for public S3 objects (or any server that speaks HTTP ranges).
+
+        Connections are pooled and kept alive in one `requests.Session`. Big
+        objects are fetched as parallel ranged parts, and every transfer
+        resumes from the last byte written when a retry is needed.
+
+        Args:
+            session (requests.Session, optional): Session to use, e.g. one pointed at a local test server
+            chunk_size (int): Bytes read from the socket at a time
+            part_size (int): Size of each ranged part in a parallel download
+            max_parts (int): Parts fetched concurrently
+            parallel_threshold (int): Objects at least this big are fetched in parallel parts
+            retries (int): Retries per transfer after the first attempt
+            backoff (float): Base delay in seconds, doubled after each retry
+            timeout (tuple): (connect, read) timeouts in seconds
+        """
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(max_parts * 2, 10))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self.chunk_size = chunk_size
+        self.part_size = part_size
+        self.max_parts = max_parts
+        self.parallel_threshold = parallel_threshold
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+    def head(self, url):
+        """
+        Size, ETag and range support of an object.
+
+        Returns:
+            dict: {'size': int or None, 'etag': str or None, 'accept_ranges': bool}
+        """
+        response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+        response.raise_for_status()
+        size = response.headers.get("Content-Length")
+        return {
+            "size": int(size) if size is not None else None,
+            "etag": response.headers.get("ETag"),
+            "accept_ranges": response.headers.get("Accept-Ranges", "").lower() == "bytes",
+        }
+
+    def _with_retries(self, attempt):
+        for retry in range(self.retries + 1):
+            try:
+                return attempt()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError, requests.exceptions.HTTPError) as e:
+                # Client errors such as 403/404 will not go away by retrying
+                response = getattr(e, "response", None)
+                if retry == self.retries or (response is not None and response.status_code < 500):
+                    raise
+                delay = self.backoff * 2 ** retry
+                print(f"Download interrupted ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def fetch_sequential(self, url, output_path, on_progress=None):
+        """
+        Stream an object to disk front to back, resuming with a Range request after a failure.
+
+        Args:
+            url (str): Object URL
+            output_path (str): Destination file
+            on_progress (Callable, optional): Called as on_progress(bytes_written, total_bytes)
+        """
+        state = {"written": 0, "total": None}
+        with open(output_path, "wb") as f:
+            def attempt():
+                headers = {"Range": f"bytes={state['written']}-"} if state["written"] else {}
+                with self.session.get(url, stream=True, headers=headers, timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    if state["written"] and response.status_code != 206:
+                        # Server ignored the range, start over
+                        state["written"] = 0
+                        f.seek(0)
+                        f.truncate()
+                    if state["total"] is None:
+                        length = response.headers.get("Content-Length")
+                        state["total"] = int(length) + state["written"] if length is not None else None
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if chunk:
+                            f.write(chunk)
+                            state["written"] += len(chunk)
+                            if on_progress is not None:
+                                # Flush so readers of the growing file see the bytes we report
+                                f.flush()
+                                on_progress(state["written"], state["total"])
+            self._with_retries(attempt)
+        return state["written"]
+
+    def _fetch_part(self, url, output_path, start, end):
+        state = {"offset": start}
+        with open(output_path, "r+b") as f:
+            def attempt():
+                headers = {"Range": f"bytes={state['offset']}-{end}"}
+                with self.session.get(url, stream=True, headers=headers, timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise requests.exceptions.HTTPError(f"Range request returned {response.status_code}")
+                    f.seek(state["offset"])
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if chunk:
+                            f.write(chunk)
+                            state["offset"] += len(chunk)
+            self._with_retries(attempt)
+        if state["offset"] != end + 1:
+            raise IOError(f"Part {start}-{end} ended at byte {state['offset']}")
+
+    def fetch_parallel(self, url, output_path, size):
+        """Fetch an object of known size as concurrent ranged parts written in place."""
+        with open(output_path, "wb") as f:
+            f.truncate(size)
+        ranges = [(start, min(start + self.part_size, size) - 1) for start in range(0, size, self.part_size)]
+        with ThreadPoolExecutor(max_workers=self.max_parts) as pool:
+            for future in [pool.submit(self._fetch_part, url, output_path, start, end) for start, end in ranges]:
+                future.result()
+        return size
+
+    def download(self, url, output_path):
+        """
+        Download an object to `output_path`, in parallel parts when it is big enough.
+
+        Returns:
+            bool: True if download was successful, False otherwise
+        """
+        try:
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+            try:
+                info = self.head(url)
+            except requests.exceptions.RequestException:
+                info = {"size": None, "accept_ranges": False}
+            if info["accept_ranges"] and info["size"] and info["size"] >= self.parallel_threshold:
+                self.fetch_parallel(url, output_path, info["size"])
+            else:
+                self.fetch_sequential(url, output_path)
+            return True
+        except (requests.exceptions.RequestException, IOError) as e:
+            print(f"Error downloading file: {e}")
+            return False
+
+    def start(self, url, output_path):
+        """
+        Start a sequential download in the background.
+
+        Returns:
+            ProgressiveDownload: Lets callers consume bytes while they arrive
+        """
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        return ProgressiveDownload(self, url, output_path)
+
+
+class ProgressiveDownload:
+    def __init__(self, downloader, url, output_path):
+        """
+        A download running on a background thread whose bytes can be read as they land on disk.
+
+        Args:
+            downloader (S3Downloader): Downloader doing the transfer
+            url (str): Object URL
+            output_path (str): Destination file
+        """
+        self.url = url
+        self.output_path = output_path
+        self.bytes_written = 0
+        self.total = None
+        self.error = None
+        self.finished = False
+        self._cond = threading.Condition()
+        # Create the file up front so readers can open it before the first byte arrives
+        open(output_path, "wb").close()
+        self._thread = threading.Thread(target=self._run, args=(downloader,), daemon=True)
+        self._thread.start()
+
+    def _advance(self, written, total):
+        with self._cond:
+            self.bytes_written = written
+            self.total = total
+            self._cond.notify_all()
+
+    def _run(self, downloader):
+        try:
+            downloader.fetch_sequential(self.url, self.output_path, on_progress=self._advance)
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._cond:
+                self.finished = True
+                self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        """
+        Block until the download ends.
+
+        Returns:
+            bool: True if the whole object was downloaded
+        """
+        self._thread.join(timeout)
+        if self.error is not None:
+            print(f"Error downloading file: {self.error}")
+        return self.finished and self.error is None
+
+    def wait_for(self, n_bytes):
+        """Block until at least `n_bytes` are on disk or the download ends; return the bytes available."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.bytes_written >= n_bytes or self.finished)
+            return self.bytes_written
+
+    def read_at(self, offset, size):
+        """Read up to `size` bytes at `offset`, waiting for them to arrive (short only at the end of the object)."""
+        available = self.wait_for(offset + size)
+        if self.error is not None:
+            raise IOError(f"Download failed: {self.error}")
+        with open(self.output_path, "rb") as f:
+            f.seek(offset)
+            return f.read(max(min(size, available - offset), 0))
+
+    def iter_bytes(self, chunk_size=256 * 1024):
+        """
+        Yield the object front to back as it downloads.
+
+        Raises:
+            IOError: If the download fails midway
+        """
+        offset = 0
+        with open(self.output_path, "rb") as f:
+            while True:
+                available = self.wait_for(offset + 1)
+                if self.error is not None:
+                    raise IOError(f"Download failed: {self.error}")
+                if available <= offset:
+                    return
+                f.seek(offset)
+                data = f.read(min(available - offset, chunk_size))
+                offset += len(data)
+                yield data
+
+
+downloader = S3Downloader(
+    chunk_size=int(os.getenv("S3_CHUNK_SIZE", 1024 * 1024)),
+    part_size=int(os.getenv("S3_PART_SIZE", 8 * 1024 * 1024)),
+    max_parts=int(os.getenv("S3_MAX_PARTS", "4")),
+)
+
 
 def download_s3_file(url, output_path):
     """
     Downloads a file from a public S3 URL to the specified local path.
-    
+
     Args:
         url (str): The public S3 URL of the file
         output_path (str): Local path where the file should be saved
-        
+
     Returns:
         bool: True if download was successful, False otherwise
     """
-    try:
-        # Send a GET request to the URL
-        response = requests.get(url, stream=True)
-        response.raise_for_status()  # Raises an HTTPError if the status is 4xx, 5xx
-        
-        # Create the directory if it doesn't exist
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        # Write the file to disk in chunks to handle large files efficiently
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    
-        return True
-        
-    except requests.exceptions.RequestException as e:
-        print(f"Error downloading file: {e}")
-        return False
-
-
-# import uuid
-
-# url = "https://rp-projects-public.s3.amazonaws.com/1736350118327-WhatsApp+Video+2025-01-08+at+19.02.55.mp4"
-# output_path = fr"D:\Python\python_projects_docker\recruitment_project\download\{uuid.uuid4()}_sample.mp4"
-# success = download_s3_file(url, output_path)
\ No newline at end of file
+    return downloader.download(url, output_path)
@@ -1,20 +1,129 @@
 import chromadb
 from chromadb.config import Settings
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, OpenAI
+import asyncio
+import httpx
 import os
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Iterator, List, Dict, Optional, Set, Tuple
 import json
+from datetime import datetime
+import numpy as np
+from chunking import chunk_text
+from embedding_cache import EmbeddingCache, normalize_text
+from lexical_index import LexicalIndex
+import matching
+
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+LIST_PAGE_SIZE = int(os.getenv("VECTORDB_LIST_PAGE_SIZE", "500"))
+PROJECTIONS = ("full", "truncated", "ids")
+AGGREGATIONS = ("max", "mean")
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+# Reciprocal rank fusion constant, damps the weight of the very first ranks
+RRF_K = 60
+# Candidates taken from each ranking per requested result in hybrid search
+HYBRID_DEPTH = int(os.getenv("VECTORDB_HYBRID_DEPTH", "4"))
+# Chunk hits fetched per requested document when searching
+SEARCH_FANOUT = int(os.getenv("VECTORDB_SEARCH_FANOUT", "8"))
+# Metadata keys used internally on section rows
+RESERVED_METADATA = ("parent_id", "chunk")
+
+
+def clean_metadata(metadata: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Validate document metadata for storage in Chroma.
+
+    None values are dropped and a `posted_at` given as a datetime or ISO
+    string is converted to epoch seconds, so it can be range-filtered.
+
+    Raises:
+        ValueError: For reserved keys or values that are not str, int, float or bool
+    """
+    if not metadata:
+        return None
+    cleaned = {}
+    for key, value in metadata.items():
+        if value is None:
+            continue
+        if key in RESERVED_METADATA:
+            raise ValueError(f"metadata key '{key}' is reserved")
+        if key == "posted_at":
+            if isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            if isinstance(value, datetime):
+                value = value.timestamp()
+            value = int(value)
+        if not isinstance(value, (str, int, float, bool)):
+            raise ValueError(f"metadata '{key}' must be a string, number or boolean")
+        cleaned[key] = value
+    return cleaned or None
+
+
+def metadata_filter(company: Optional[str] = None, location: Optional[str] = None, active: Optional[bool] = None,
+                    posted_after: Optional[datetime] = None, posted_before: Optional[datetime] = None,
+                    where: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Build a Chroma `where` filter from search parameters.
+
+    Args:
+        company (str, optional): Exact company
+        location (str, optional): Exact location
+        active (bool, optional): Active flag
+        posted_after (datetime, optional): Earliest posting time (inclusive)
+        posted_before (datetime, optional): Latest posting time (inclusive)
+        where (Dict, optional): Extra Chroma filter combined with the above
+
+    Returns:
+        Optional[Dict]: The filter, or None when nothing is filtered
+    """
+    conditions = []
+    if company is not None:
+        conditions.append({"company": company})
+    if location is not None:
+        conditions.append({"location": location})
+    if active is not None:
+        conditions.append({"active": active})
+    if posted_after is not None:
+        conditions.append({"posted_at": {"$gte": int(posted_after.timestamp())}})
+    if posted_before is not None:
+        conditions.append({"posted_at": {"$lte": int(posted_before.timestamp())}})
+    if where:
+        conditions.append(where)
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
 
 class VectorDBManager:
-    def __init__(self, openai_api_key: str, persist_directory: str = "./vector_db"):
+    def __init__(
+        self,
+        openai_api_key: str,
+        persist_directory: str = "./vector_db",
+        client=None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embedding_model: str = "text-embedding-3-small",
+        lexical_index: Optional[LexicalIndex] = None,
+    ):
         """
         Initialize the Vector Database Manager.
         
         Args:
             openai_api_key (str): OpenAI API key for generating embeddings
             persist_directory (str): Directory to persist ChromaDB data
+            client: Embeddings client, defaults to OpenAI (anything with `embeddings.create` works)
+            embedding_cache (EmbeddingCache): Cache of generated embeddings, defaults to
+                embedding_cache.db in `persist_directory`
+            embedding_model (str): Embedding model name
+            lexical_index (LexicalIndex): BM25 index of the same documents, defaults to
+                lexical_index.db in `persist_directory`
         """
-        self.client = OpenAI(api_key=openai_api_key)
+        self.client = client or OpenAI(api_key=openai_api_key)
+        self.embedding_model = embedding_model
+        if embedding_cache is None:
+            os.makedirs(persist_directory, exist_ok=True)
+            embedding_cache = EmbeddingCache(os.path.join(persist_directory, "embedding_cache.db"))
+        self.embedding_cache = embedding_cache
         
         # Initialize ChromaDB with persistence
         self.chroma_client = chromadb.PersistentClient(path=persist_directory)
@@ -23,6 +132,27 @@ class VectorDBManager:
         self.jobs_collection = self.chroma_client.get_or_create_collection(name="jobs")
         self.resumes_collection = self.chroma_client.get_or_create_collection(name="resumes")
 
+        # Overlapping sections of each document, linked to it by `parent_id` metadata
+        self.job_chunks_collection = self.chroma_client.get_or_create_collection(name="job_chunks")
+        self.resume_chunks_collection = self.chroma_client.get_or_create_collection(name="resume_chunks")
+        self._chunk_collections = {
+            self.jobs_collection.name: self.job_chunks_collection,
+            self.resumes_collection.name: self.resume_chunks_collection,
+        }
+
+        if lexical_index is None:
+            lexical_index = LexicalIndex(os.path.join(persist_directory, "lexical_index.db"))
+        self.lexical_index = lexical_index
+        for collection in (self.jobs_collection, self.resumes_collection):
+            self._sync_lexical_index(collection)
+
+        # Documents stored before chunked embeddings, searched by their whole-document vector until backfilled.
+        # Replaced, never mutated, so searches on other threads can iterate their snapshot.
+        self._unchunked: Dict[str, Set[str]] = {
+            collection.name: self._find_unchunked(collection)
+            for collection in (self.jobs_collection, self.resumes_collection)
+        }
+
     def _generate_embedding(self, text: str) -> List[float]:
         """
         Generate embeddings using OpenAI's API.
@@ -33,42 +163,269 @@ class VectorDBManager:
         Returns:
             List[float]: Vector embedding
         """
-        response = self.client.embeddings.create(
-            input=text,
-            model="text-embedding-3-small"
+        return self._generate_embeddings([text])[0]
+
+    def _generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for several texts, calling the API only for cache misses.
+        
+        Texts that normalize to the same string are embedded once.
+        
+        Args:
+            texts (List[str]): Texts to generate embeddings for
+            
+        Returns:
+            List[List[float]]: One vector per text, in input order
+        """
+        embeddings, missing = self._lookup_embeddings(texts)
+        if missing:
+            response = self.client.embeddings.create(
+                input=list(missing.values()),
+                model=self.embedding_model
+            )
+            embeddings = self._merge_embeddings(texts, embeddings, missing, response)
+        return embeddings
+
+    def _lookup_embeddings(self, texts: List[str]) -> Tuple[List[Optional[List[float]]], Dict[str, str]]:
+        """Cached vectors of `texts` (None for misses) and the distinct misses keyed by normalized text."""
+        embeddings = self.embedding_cache.get_many(self.embedding_model, texts)
+        missing = {}
+        for text, embedding in zip(texts, embeddings):
+            if embedding is None:
+                missing.setdefault(normalize_text(text), text)
+        return embeddings, missing
+
+    def _merge_embeddings(self, texts: List[str], embeddings: List[Optional[List[float]]],
+                          missing: Dict[str, str], response) -> List[List[float]]:
+        """Cache the vectors of an embeddings response and fill them into the gaps of `embeddings`."""
+        misses = list(missing.values())
+        generated = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        self.embedding_cache.put_many(self.embedding_model, misses, generated)
+        by_key = dict(zip(missing, generated))
+        return [
+            embedding if embedding is not None else by_key[normalize_text(text)]
+            for text, embedding in zip(texts, embeddings)
+        ]
+
+    def _chunks_of(self, collection):
+        return self._chunk_collections[collection.name]
+
+    @staticmethod
+    def _split_documents(texts: List[str]) -> Tuple[List[str], List[int]]:
+        """All sections of `texts` in order, and the number of sections of each text."""
+        chunk_texts, counts = [], []
+        for text in texts:
+            chunks = chunk_text(text)
+            chunk_texts.extend(chunks)
+            counts.append(len(chunks))
+        return chunk_texts, counts
+
+    def _embed_documents(self, texts: List[str]) -> Tuple[List[str], List[int], List[List[float]]]:
+        """Split documents into sections and embed all sections with one request."""
+        chunk_texts, counts = self._split_documents(texts)
+        return chunk_texts, counts, self._generate_embeddings(chunk_texts)
+
+    def _store(self, collection, ids: List[str], texts: List[str], chunk_texts: List[str],
+               counts: List[int], chunk_embeddings: List[List[float]],
+               metadatas: Optional[List[Optional[Dict[str, Any]]]] = None) -> None:
+        """
+        Write documents and their sections, replacing earlier versions.
+        
+        Sections go to the chunk collection with `parent_id` metadata plus a
+        copy of the document's own metadata, so searches can filter on it.
+        The document itself is stored with the normalized mean of its section
+        vectors, which equals the plain document embedding for short texts.
+        """
+        metadatas = metadatas or [None] * len(ids)
+        chunks = self._chunks_of(collection)
+        chunks.delete(where={"parent_id": {"$in": ids}})
+        # Delete rather than upsert documents, Chroma would merge old and new metadata
+        existing = collection.get(ids=ids, include=[])['ids']
+        if existing:
+            collection.delete(ids=existing)
+        chunk_ids, chunk_metadatas, parents = [], [], []
+        start = 0
+        for doc_id, count, metadata in zip(ids, counts, metadatas):
+            chunk_ids.extend(f"{doc_id}#{i}" for i in range(count))
+            chunk_metadatas.extend({**(metadata or {}), "parent_id": doc_id, "chunk": i} for i in range(count))
+            parents.append(self._mean_vector(chunk_embeddings[start:start + count]))
+            start += count
+        chunks.upsert(
+            embeddings=chunk_embeddings,
+            documents=chunk_texts,
+            metadatas=chunk_metadatas,
+            ids=chunk_ids
+        )
+        collection.upsert(
+            embeddings=parents,
+            documents=texts,
+            metadatas=metadatas if any(metadatas) else None,
+            ids=ids
         )
-        return response.data[0].embedding
+        self.lexical_index.add_many(collection.name, zip(ids, texts))
+        self._forget_unchunked(collection, ids)
 
-    def add_job(self, job_id: str, job_text: str) -> None:
+    def _forget_unchunked(self, collection, ids: List[str]) -> None:
+        if self._unchunked[collection.name]:
+            self._unchunked[collection.name] = self._unchunked[collection.name] - set(ids)
+
+    @staticmethod
+    def _mean_vector(vectors: List[List[float]]) -> List[float]:
+        mean = np.mean(np.asarray(vectors, dtype=np.float32), axis=0)
+        norm = np.linalg.norm(mean)
+        return (mean / norm if norm else mean).tolist()
+
+    @staticmethod
+    def _exists(collection, doc_id: str) -> bool:
+        return bool(collection.get(ids=[doc_id], include=[])['ids'])
+
+    def _add(self, collection, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        metadata = clean_metadata(metadata)
+        # Like Chroma's add, adding an id that is already stored leaves it untouched
+        if self._exists(collection, doc_id):
+            return
+        chunk_texts, counts, embeddings = self._embed_documents([text])
+        self._store(collection, [doc_id], [text], chunk_texts, counts, embeddings, [metadata])
+
+    def add_job(self, job_id: str, job_text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
         """
         Add a job posting to the database.
         
+        Long postings are split into overlapping sections that are embedded
+        together and searched individually.
+        
         Args:
             job_id (str): Unique identifier for the job
             job_text (str): Job posting text
+            metadata (Dict, optional): Filterable attributes such as company, location,
+                posted_at (datetime, ISO string or epoch seconds) and active
         """
-        embedding = self._generate_embedding(job_text)
-        self.jobs_collection.add(
-            embeddings=[embedding],
-            documents=[job_text],
-            ids=[job_id]
-        )
+        self._add(self.jobs_collection, job_id, job_text, metadata)
 
-    def add_resume(self, resume_id: str, resume_text: str) -> None:
+    def add_resume(self, resume_id: str, resume_text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
         """
         Add a resume to the database.
         
+        Long resumes are split into overlapping sections that are embedded
+        together and searched individually.
+        
         Args:
             resume_id (str): Unique identifier for the resume
             resume_text (str): Resume text
+            metadata (Dict, optional): Filterable attributes such as company, location,
+                posted_at (datetime, ISO string or epoch seconds) and active
+        """
+        self._add(self.resumes_collection, resume_id, resume_text, metadata)
+
+    @staticmethod
+    def _plan_batches(items: List[Tuple], batch_size: Optional[int] = None) -> Tuple[List[Dict], List[List[int]]]:
         """
-        embedding = self._generate_embedding(resume_text)
-        self.resumes_collection.add(
-            embeddings=[embedding],
-            documents=[resume_text],
-            ids=[resume_id]
+        Validate bulk input and split the valid items into batches.
+        
+        Items are (id, text) or (id, text, metadata) tuples.
+        
+        Returns:
+            Tuple[List[Dict], List[List[int]]]: Per-item status (invalid items already
+                marked failed) and batches of indices into `items`
+        """
+        batch_size = max(batch_size or EMBEDDING_BATCH_SIZE, 1)
+        results = [{'id': item[0], 'status': 'created', 'error': None} for item in items]
+        valid, seen = [], set()
+        for index, item in enumerate(items):
+            item_id, text = item[0], item[1]
+            if not item_id or not text or not text.strip():
+                results[index].update(status='failed', error="id and text must not be empty")
+                continue
+            try:
+                clean_metadata(item[2] if len(item) > 2 else None)
+            except ValueError as e:
+                results[index].update(status='failed', error=str(e))
+                continue
+            if item_id in seen:
+                results[index].update(status='failed', error="duplicate id in request")
+            else:
+                seen.add(item_id)
+                valid.append(index)
+        batches = [valid[start:start + batch_size] for start in range(0, len(valid), batch_size)]
+        return results, batches
+
+    def _store_batch(self, collection, items: List[Tuple], batch: List[int], embedded) -> None:
+        chunk_texts, counts, embeddings = embedded
+        self._store(
+            collection,
+            [items[index][0] for index in batch],
+            [items[index][1] for index in batch],
+            chunk_texts, counts, embeddings,
+            [clean_metadata(items[index][2]) if len(items[index]) > 2 else None for index in batch]
         )
 
+    def _add_many(self, collection, items: List[Tuple], batch_size: Optional[int] = None,
+                  max_concurrency: Optional[int] = None) -> List[Dict]:
+        """
+        Embed and upsert documents in batches.
+        
+        Each batch of `batch_size` documents takes one embeddings request (for
+        all of their sections) and one Chroma upsert per collection; up to
+        `max_concurrency` embedding requests are in flight at once. Upserts
+        happen on the calling thread as batches finish, so Chroma only ever
+        sees one writer.
+        
+        Args:
+            collection: Chroma collection to write to
+            items (List[Tuple]): (id, text) or (id, text, metadata) tuples
+            batch_size (int, optional): Documents per embeddings request
+            max_concurrency (int, optional): Embedding requests run in parallel
+            
+        Returns:
+            List[Dict]: {'id', 'status': 'created' | 'failed', 'error'} per item, in input order
+        """
+        max_concurrency = max(max_concurrency or EMBEDDING_MAX_CONCURRENCY, 1)
+        results, batches = self._plan_batches(items, batch_size)
+
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="embed") as pool:
+            futures = {
+                pool.submit(self._embed_documents, [items[index][1] for index in batch]): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    self._store_batch(collection, items, batch, future.result())
+                except Exception as e:
+                    for index in batch:
+                        results[index].update(status='failed', error=str(e))
+        return results
+
+    def add_jobs(self, jobs: List[Tuple], batch_size: Optional[int] = None,
+                 max_concurrency: Optional[int] = None) -> List[Dict]:
+        """
+        Add or update many job postings with batched embedding requests.
+        
+        Args:
+            jobs (List[Tuple]): (job_id, job_text) or (job_id, job_text, metadata) tuples
+            batch_size (int, optional): Jobs per embeddings request, defaults to EMBEDDING_BATCH_SIZE
+            max_concurrency (int, optional): Requests in flight, defaults to EMBEDDING_MAX_CONCURRENCY
+            
+        Returns:
+            List[Dict]: Status of each job, in input order
+        """
+        return self._add_many(self.jobs_collection, jobs, batch_size, max_concurrency)
+
+    def add_resumes(self, resumes: List[Tuple], batch_size: Optional[int] = None,
+                    max_concurrency: Optional[int] = None) -> List[Dict]:
+        """
+        Add or update many resumes with batched embedding requests.
+        
+        Args:
+            resumes (List[Tuple]): (resume_id, resume_text) or (resume_id, resume_text, metadata) tuples
+            batch_size (int, optional): Resumes per embeddings request, defaults to EMBEDDING_BATCH_SIZE
+            max_concurrency (int, optional): Requests in flight, defaults to EMBEDDING_MAX_CONCURRENCY
+            
+        Returns:
+            List[Dict]: Status of each resume, in input order
+        """
+        return self._add_many(self.resumes_collection, resumes, batch_size, max_concurrency)
+
     def delete_job(self, job_id: str) -> None:
         """
         Delete a job posting from the database.
@@ -77,6 +434,9 @@ class VectorDBManager:
             job_id (str): ID of the job to delete
         """
         self.jobs_collection.delete(ids=[job_id])
+        self.job_chunks_collection.delete(where={"parent_id": job_id})
+        self.lexical_index.remove(self.jobs_collection.name, [job_id])
+        self._forget_unchunked(self.jobs_collection, [job_id])
 
     def delete_resume(self, resume_id: str) -> None:
         """
@@ -86,81 +446,569 @@ class VectorDBManager:
             resume_id (str): ID of the resume to delete
         """
         self.resumes_collection.delete(ids=[resume_id])
+        self.resume_chunks_collection.delete(where={"parent_id": resume_id})
+        self.lexical_index.remove(self.resumes_collection.name, [resume_id])
+        self._forget_unchunked(self.resumes_collection, [resume_id])
 
-    def list_jobs(self) -> List[Dict]:
+    @staticmethod
+    def _get_page(collection, offset: int, limit: int, fields: str = "full", max_chars: int = 200) -> List[Dict]:
         """
-        List all jobs in the database.
+        One page of stored documents in insertion order.
         
-        Returns:
-            List[Dict]: List of jobs with their IDs and documents
+        Args:
+            collection: Chroma collection to read
+            offset (int): Documents to skip
+            limit (int): Maximum number of documents returned
+            fields (str): "full" text, text "truncated" to `max_chars`, or "ids" only
+            max_chars (int): Text length kept by the "truncated" projection
         """
-        results = self.jobs_collection.get()
+        if fields not in PROJECTIONS:
+            raise ValueError(f"fields must be one of {', '.join(PROJECTIONS)}")
+        if fields == "ids":
+            results = collection.get(limit=limit, offset=offset, include=[])
+            return [{'id': id} for id in results['ids']]
+        results = collection.get(limit=limit, offset=offset, include=["documents"])
+        if fields == "truncated":
+            return [
+                {'id': id, 'text': doc[:max_chars]}
+                for id, doc in zip(results['ids'], results['documents'])
+            ]
         return [
             {'id': id, 'text': doc}
             for id, doc in zip(results['ids'], results['documents'])
         ]
 
-    def list_resumes(self) -> List[Dict]:
+    @classmethod
+    def _iter_documents(cls, collection, offset: int = 0, limit: Optional[int] = None, fields: str = "full",
+                        max_chars: int = 200, page_size: Optional[int] = None) -> Iterator[Dict]:
+        """Yield documents page by page, so only `page_size` of them are in memory at once."""
+        page_size = max(page_size or LIST_PAGE_SIZE, 1)
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            page = cls._get_page(collection, offset, size, fields, max_chars)
+            yield from page
+            if len(page) < size:
+                return
+            offset += len(page)
+            if remaining is not None:
+                remaining -= len(page)
+
+    @classmethod
+    def _list(cls, collection, offset: int = 0, limit: Optional[int] = None, fields: str = "full",
+              max_chars: int = 200) -> List[Dict]:
+        if limit is not None:
+            return cls._get_page(collection, offset, limit, fields, max_chars)
+        return list(cls._iter_documents(collection, offset, None, fields, max_chars))
+
+    def _vector_rank(self, collection, query_embedding: List[float], n_results: int, aggregate: str = "max",
+                     top_k: int = 3, where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
         """
-        List all resumes in the database.
+        Rank documents by their best matching sections.
+        
+        One query against the chunk collection fetches the nearest sections,
+        which are grouped by parent document and scored by the distance of
+        the closest one ("max" similarity) or the mean over the `top_k`
+        closest ("mean"). The `where` filter is applied inside that query,
+        so only matching documents are ever ranked. Documents stored before
+        chunked embeddings compete with their whole-document vector until
+        they are backfilled.
+        
+        The query asks for `SEARCH_FANOUT` sections per requested document.
+        When a few long documents take up all of those and fewer than
+        `n_results` distinct documents come back, it is repeated with twice
+        as many sections until enough documents are found or every matching
+        section was fetched.
         
         Returns:
-            List[Dict]: List of resumes with their IDs and documents
+            List[Tuple[str, float]]: Up to `n_results` (id, aggregated distance) pairs, closest first
         """
-        results = self.resumes_collection.get()
-        return [
-            {'id': id, 'text': doc}
-            for id, doc in zip(results['ids'], results['documents'])
-        ]
+        if aggregate not in AGGREGATIONS:
+            raise ValueError(f"aggregate must be one of {', '.join(AGGREGATIONS)}")
+        top_k = max(top_k, 1) if aggregate == "mean" else 1
+        chunks = self._chunks_of(collection)
+        total = chunks.count()
+        fetch = min(n_results * max(SEARCH_FANOUT, top_k), total)
+        hits: Dict[str, List[float]] = {}
+        while fetch > 0:
+            results = chunks.query(
+                query_embeddings=[query_embedding],
+                n_results=fetch,
+                where=where,
+                include=["metadatas", "distances"]
+            )
+            hits = {}
+            for metadata, dist in zip(results['metadatas'][0], results['distances'][0]):
+                hits.setdefault(metadata['parent_id'], []).append(dist)
+            # Fewer hits than asked for means the filter matched no more sections
+            if len(hits) >= n_results or len(results['ids'][0]) < fetch or fetch >= total:
+                break
+            fetch = min(fetch * 2, total)
+        scores = {parent_id: float(np.mean(dists[:top_k])) for parent_id, dists in hits.items()}
+        unchunked = self._unchunked[collection.name]
+        if unchunked:
+            scores.update(self._unchunked_distances(collection, unchunked, query_embedding, where))
+        return [(id, scores[id]) for id in sorted(scores, key=scores.get)[:n_results]]
 
-    def search_similar_jobs(self, query_text: str, n_results: int = 5) -> List[Dict]:
+    @staticmethod
+    def _unchunked_distances(collection, ids: Set[str], query_embedding: List[float],
+                             where: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+        """
+        Distances of documents without sections, from their stored whole-document vectors.
+        
+        Chroma cannot restrict a query to given ids, so these are scored
+        exactly here with the same squared L2 distance as its queries. The
+        set is empty once backfill_chunks has run.
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        ids = list(ids)
+        distances = {}
+        for start in range(0, len(ids), LIST_PAGE_SIZE):
+            page = collection.get(ids=ids[start:start + LIST_PAGE_SIZE], where=where, include=["embeddings"])
+            if len(page['ids']):
+                vectors = np.asarray(page['embeddings'], dtype=np.float32)
+                distances.update(zip(page['ids'], np.sum((vectors - query) ** 2, axis=1).tolist()))
+        return distances
+
+    def _lexical_rank(self, collection, query_text: str, n_results: int,
+                      where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        """BM25 ranking of a collection, restricted to documents matching `where`."""
+        allowed = set(collection.get(where=where, include=[])['ids']) if where else None
+        return self.lexical_index.search(collection.name, query_text, n_results, allowed)
+
+    def _search(self, collection, query_text: str, query_embedding: Optional[List[float]], n_results: int,
+                aggregate: str = "max", top_k: int = 3, where: Optional[Dict[str, Any]] = None,
+                mode: str = "vector") -> List[Dict]:
+        """
+        Search a collection by vector similarity, BM25 or both.
+        
+        "hybrid" takes the best `HYBRID_DEPTH * n_results` documents of each
+        ranking and orders their union by reciprocal rank fusion. The texts
+        of the returned documents are fetched with a single Chroma get.
+        
+        Returns:
+            List[Dict]: Documents with their IDs and texts, plus the vector `distance` and/or
+                lexical or fused `score` depending on the mode
+        """
+        if mode == "vector":
+            results = [
+                {'id': id, 'distance': dist}
+                for id, dist in self._vector_rank(collection, query_embedding, n_results, aggregate, top_k, where)
+            ]
+        elif mode == "lexical":
+            results = [
+                {'id': id, 'score': score}
+                for id, score in self._lexical_rank(collection, query_text, n_results, where)
+            ]
+        elif mode == "hybrid":
+            depth = n_results * max(HYBRID_DEPTH, 1)
+            vector = self._vector_rank(collection, query_embedding, depth, aggregate, top_k, where)
+            lexical = self._lexical_rank(collection, query_text, depth, where)
+            distances = dict(vector)
+            fused: Dict[str, float] = {}
+            for ranking in (vector, lexical):
+                for rank, (id, _) in enumerate(ranking):
+                    fused[id] = fused.get(id, 0.0) + 1 / (RRF_K + rank + 1)
+            results = [
+                {'id': id, 'distance': distances.get(id), 'score': fused[id]}
+                for id in sorted(fused, key=fused.get, reverse=True)[:n_results]
+            ]
+        else:
+            raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+        if not results:
+            return []
+        documents = collection.get(ids=[result['id'] for result in results], include=["documents"])
+        texts = dict(zip(documents['ids'], documents['documents']))
+        return [{**result, 'text': texts[result['id']]} for result in results if result['id'] in texts]
+
+    def _sync_lexical_index(self, collection) -> int:
+        """Index documents missing from the lexical index (stored before it existed); returns how many."""
+        if self.lexical_index.count(collection.name) == collection.count():
+            return 0
+        added = 0
+        for offset in range(0, collection.count(), LIST_PAGE_SIZE):
+            page = collection.get(limit=LIST_PAGE_SIZE, offset=offset, include=["documents"])
+            have = self.lexical_index.contains(collection.name, page['ids'])
+            missing = [(id, doc) for id, doc in zip(page['ids'], page['documents']) if id not in have]
+            self.lexical_index.add_many(collection.name, missing)
+            added += len(missing)
+        return added
+
+    @staticmethod
+    def _document_ids(collection) -> List[str]:
+        """Snapshot of every document id, read `LIST_PAGE_SIZE` at a time."""
+        ids, offset = [], 0
+        while True:
+            page = collection.get(limit=LIST_PAGE_SIZE, offset=offset, include=[])
+            ids.extend(page['ids'])
+            if len(page['ids']) < LIST_PAGE_SIZE:
+                return ids
+            offset += LIST_PAGE_SIZE
+
+    def _unchunked_ids(self, collection, ids: List[str]) -> List[str]:
+        """The documents among `ids` that have no sections stored."""
+        if not ids:
+            return []
+        chunked = self._chunks_of(collection).get(where={"parent_id": {"$in": ids}}, include=["metadatas"])
+        have = {metadata['parent_id'] for metadata in chunked['metadatas']}
+        return [id for id in ids if id not in have]
+
+    def _find_unchunked(self, collection) -> Set[str]:
+        ids = self._document_ids(collection)
+        unchunked = set()
+        for start in range(0, len(ids), LIST_PAGE_SIZE):
+            unchunked.update(self._unchunked_ids(collection, ids[start:start + LIST_PAGE_SIZE]))
+        return unchunked
+
+    def _missing_chunks(self, collection, ids: List[str]) -> List[Tuple]:
+        """(id, text, metadata) of the documents among `ids` that have no sections stored yet."""
+        missing = self._unchunked_ids(collection, ids)
+        if not missing:
+            return []
+        page = collection.get(ids=missing, include=["documents", "metadatas"])
+        return list(zip(page['ids'], page['documents'], page['metadatas']))
+
+    def backfill_chunks(self, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Section and re-embed documents stored before chunked embeddings existed.
+        
+        Returns:
+            Dict[str, int]: Number of documents backfilled per collection
+        """
+        batch_size = max(batch_size or EMBEDDING_BATCH_SIZE, 1)
+        done = {}
+        for collection in (self.jobs_collection, self.resumes_collection):
+            done[collection.name] = 0
+            # Page by a snapshot of ids: rewritten documents move to the end of Chroma's order,
+            # so a moving offset would skip the ones shifting forward
+            ids = self._document_ids(collection)
+            for start in range(0, len(ids), batch_size):
+                missing = self._missing_chunks(collection, ids[start:start + batch_size])
+                if missing:
+                    self._store_batch(collection, missing, list(range(len(missing))),
+                                      self._embed_documents([item[1] for item in missing]))
+                    done[collection.name] += len(missing)
+        return done
+
+    def list_jobs(self, offset: int = 0, limit: Optional[int] = None, fields: str = "full",
+                  max_chars: int = 200) -> List[Dict]:
+        """
+        List jobs in the database, optionally one page at a time.
+        
+        Args:
+            offset (int): Jobs to skip
+            limit (int, optional): Maximum number of jobs returned, all of them by default
+            fields (str): "full" text, text "truncated" to `max_chars`, or "ids" only
+            max_chars (int): Text length kept by the "truncated" projection
+            
+        Returns:
+            List[Dict]: List of jobs with their IDs and (possibly truncated) documents
+        """
+        return self._list(self.jobs_collection, offset, limit, fields, max_chars)
+
+    def iter_jobs(self, offset: int = 0, limit: Optional[int] = None, fields: str = "full",
+                  max_chars: int = 200, page_size: Optional[int] = None) -> Iterator[Dict]:
+        """Like list_jobs, but yields jobs while reading them from Chroma `page_size` at a time."""
+        return self._iter_documents(self.jobs_collection, offset, limit, fields, max_chars, page_size)
+
+    def list_resumes(self, offset: int = 0, limit: Optional[int] = None, fields: str = "full",
+                     max_chars: int = 200) -> List[Dict]:
+        """
+        List resumes in the database, optionally one page at a time.
+        
+        Args:
+            offset (int): Resumes to skip
+            limit (int, optional): Maximum number of resumes returned, all of them by default
+            fields (str): "full" text, text "truncated" to `max_chars`, or "ids" only
+            max_chars (int): Text length kept by the "truncated" projection
+            
+        Returns:
+            List[Dict]: List of resumes with their IDs and (possibly truncated) documents
+        """
+        return self._list(self.resumes_collection, offset, limit, fields, max_chars)
+
+    def iter_resumes(self, offset: int = 0, limit: Optional[int] = None, fields: str = "full",
+                     max_chars: int = 200, page_size: Optional[int] = None) -> Iterator[Dict]:
+        """Like list_resumes, but yields resumes while reading them from Chroma `page_size` at a time."""
+        return self._iter_documents(self.resumes_collection, offset, limit, fields, max_chars, page_size)
+
+    def search_similar_jobs(self, query_text: str, n_results: int = 5, aggregate: str = "max",
+                            top_k: int = 3, where: Optional[Dict[str, Any]] = None, mode: str = "vector") -> List[Dict]:
         """
         Search for similar jobs using a text query.
         
         Args:
             query_text (str): Text to search with
             n_results (int): Number of results to return
+            aggregate (str): Score jobs by their closest section ("max") or the mean of their `top_k` closest ("mean")
+            top_k (int): Sections averaged by the "mean" aggregation
+            where (Dict, optional): Chroma metadata filter, see metadata_filter
+            mode (str): "vector" similarity, "lexical" BM25 (no embedding request) or "hybrid" fusion of both
             
         Returns:
-            List[Dict]: Similar jobs with their IDs, texts, and distances
+            List[Dict]: Similar jobs with their IDs, texts, and distances (and scores outside "vector" mode)
         """
-        query_embedding = self._generate_embedding(query_text)
-        results = self.jobs_collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results
-        )
-        return [
-            {'id': id, 'text': doc, 'distance': dist}
-            for id, doc, dist in zip(
-                results['ids'][0], 
-                results['documents'][0],
-                results['distances'][0]
-            )
-        ]
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+        query_embedding = None if mode == "lexical" else self._generate_embedding(query_text)
+        return self._search(self.jobs_collection, query_text, query_embedding, n_results, aggregate, top_k, where, mode)
 
-    def search_similar_resumes(self, query_text: str, n_results: int = 5) -> List[Dict]:
+    def search_similar_resumes(self, query_text: str, n_results: int = 5, aggregate: str = "max",
+                               top_k: int = 3, where: Optional[Dict[str, Any]] = None, mode: str = "vector") -> List[Dict]:
         """
         Search for similar resumes using a text query.
         
         Args:
             query_text (str): Text to search with
             n_results (int): Number of results to return
+            aggregate (str): Score resumes by their closest section ("max") or the mean of their `top_k` closest ("mean")
+            top_k (int): Sections averaged by the "mean" aggregation
+            where (Dict, optional): Chroma metadata filter, see metadata_filter
+            mode (str): "vector" similarity, "lexical" BM25 (no embedding request) or "hybrid" fusion of both
+            
+        Returns:
+            List[Dict]: Similar resumes with their IDs, texts, and distances (and scores outside "vector" mode)
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+        query_embedding = None if mode == "lexical" else self._generate_embedding(query_text)
+        return self._search(self.resumes_collection, query_text, query_embedding, n_results, aggregate, top_k, where, mode)
+
+    def match_jobs_to_resumes(self, job_ids: Optional[List[str]] = None, resume_ids: Optional[List[str]] = None,
+                              top_k: int = 10) -> Dict:
+        """
+        Best resumes for each job, from the vectors already stored (no embedding requests).
+        
+        Args:
+            job_ids (List[str], optional): Jobs to match, all jobs when None
+            resume_ids (List[str], optional): Candidate resumes, all resumes when None
+            top_k (int): Resumes returned per job
+            
+        Returns:
+            Dict: {'matches': {job_id: [{'id', 'score', 'distance'}, ...]}, 'missing': [unknown ids]}
+        """
+        return matching.match(self.jobs_collection, self.resumes_collection, job_ids, resume_ids, top_k)
+
+    def match_resumes_to_jobs(self, resume_ids: Optional[List[str]] = None, job_ids: Optional[List[str]] = None,
+                              top_k: int = 10) -> Dict:
+        """
+        Best jobs for each resume, from the vectors already stored (no embedding requests).
+        
+        Args:
+            resume_ids (List[str], optional): Resumes to match, all resumes when None
+            job_ids (List[str], optional): Candidate jobs, all jobs when None
+            top_k (int): Jobs returned per resume
             
         Returns:
-            List[Dict]: Similar resumes with their IDs, texts, and distances
+            Dict: {'matches': {resume_id: [{'id', 'score', 'distance'}, ...]}, 'missing': [unknown ids]}
+        """
+        return matching.match(self.resumes_collection, self.jobs_collection, resume_ids, job_ids, top_k)
+
+
+class AsyncVectorDBManager:
+    def __init__(
+        self,
+        openai_api_key: str,
+        persist_directory: str = "./vector_db",
+        client=None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embedding_model: str = "text-embedding-3-small",
+        max_connections: int = 20,
+        chroma_workers: int = 4,
+    ):
+        """
+        Non-blocking counterpart of VectorDBManager for use from async routes.
+        
+        Embeddings come from an AsyncOpenAI client on a shared, bounded
+        connection pool; Chroma and embedding cache calls run on a dedicated
+        thread pool so they never block the event loop. Storage is shared
+        with a wrapped VectorDBManager, available as `sync`.
+        
+        Args:
+            openai_api_key (str): OpenAI API key for generating embeddings
+            persist_directory (str): Directory to persist ChromaDB data
+            client: Async embeddings client, defaults to AsyncOpenAI (anything with
+                an awaitable `embeddings.create` works)
+            embedding_cache (EmbeddingCache): Cache of generated embeddings
+            embedding_model (str): Embedding model name
+            max_connections (int): Size of the HTTP connection pool to the embeddings API
+            chroma_workers (int): Threads running Chroma and cache operations
         """
-        query_embedding = self._generate_embedding(query_text)
-        results = self.resumes_collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=openai_api_key,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+                ),
+            )
+        self.client = client
+        self.sync = VectorDBManager(
+            openai_api_key,
+            persist_directory=persist_directory,
+            client=_NoSyncClient(),
+            embedding_cache=embedding_cache,
+            embedding_model=embedding_model,
         )
-        return [
-            {'id': id, 'text': doc, 'distance': dist}
-            for id, doc, dist in zip(
-                results['ids'][0], 
-                results['documents'][0],
-                results['distances'][0]
+        self._executor = ThreadPoolExecutor(max_workers=chroma_workers, thread_name_prefix="chroma")
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def embedding_cache(self) -> EmbeddingCache:
+        return self.sync.embedding_cache
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Async version of VectorDBManager._generate_embeddings."""
+        embeddings, missing = await self._run(self.sync._lookup_embeddings, texts)
+        if missing:
+            response = await self.client.embeddings.create(
+                input=list(missing.values()),
+                model=self.sync.embedding_model
             )
-        ]
-    
+            embeddings = await self._run(self.sync._merge_embeddings, texts, embeddings, missing, response)
+        return embeddings
+
+    async def _generate_embedding(self, text: str) -> List[float]:
+        return (await self._generate_embeddings([text]))[0]
+
+    async def _embed_documents(self, texts: List[str]) -> Tuple[List[str], List[int], List[List[float]]]:
+        chunk_texts, counts = self.sync._split_documents(texts)
+        return chunk_texts, counts, await self._generate_embeddings(chunk_texts)
+
+    async def _add_many(self, collection, items: List[Tuple], batch_size: Optional[int] = None,
+                        max_concurrency: Optional[int] = None) -> List[Dict]:
+        """Async version of VectorDBManager._add_many: embedding requests overlap, upserts are serialized."""
+        semaphore = asyncio.Semaphore(max(max_concurrency or EMBEDDING_MAX_CONCURRENCY, 1))
+        results, batches = self.sync._plan_batches(items, batch_size)
+
+        async def add_batch(batch):
+            try:
+                async with semaphore:
+                    embedded = await self._embed_documents([items[index][1] for index in batch])
+                async with self._write_lock:
+                    await self._run(self.sync._store_batch, collection, items, batch, embedded)
+            except Exception as e:
+                for index in batch:
+                    results[index].update(status='failed', error=str(e))
+
+        await asyncio.gather(*(add_batch(batch) for batch in batches))
+        return results
+
+    async def _add(self, collection, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        metadata = clean_metadata(metadata)
+        if await self._run(self.sync._exists, collection, doc_id):
+            return
+        chunk_texts, counts, embeddings = await self._embed_documents([text])
+        async with self._write_lock:
+            await self._run(self.sync._store, collection, [doc_id], [text], chunk_texts, counts, embeddings, [metadata])
+
+    async def add_job(self, job_id: str, job_text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        await self._add(self.sync.jobs_collection, job_id, job_text, metadata)
+
+    async def add_resume(self, resume_id: str, resume_text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        await self._add(self.sync.resumes_collection, resume_id, resume_text, metadata)
+
+    async def add_jobs(self, jobs: List[Tuple], batch_size: Optional[int] = None,
+                       max_concurrency: Optional[int] = None) -> List[Dict]:
+        return await self._add_many(self.sync.jobs_collection, jobs, batch_size, max_concurrency)
+
+    async def add_resumes(self, resumes: List[Tuple], batch_size: Optional[int] = None,
+                          max_concurrency: Optional[int] = None) -> List[Dict]:
+        return await self._add_many(self.sync.resumes_collection, resumes, batch_size, max_concurrency)
+
+    async def delete_job(self, job_id: str) -> None:
+        await self._run(self.sync.delete_job, job_id)
+
+    async def delete_resume(self, resume_id: str) -> None:
+        await self._run(self.sync.delete_resume, resume_id)
+
+    async def list_jobs(self, offset: int = 0, limit: Optional[int] = None, fields: str = "full",
+                        max_chars: int = 200) -> List[Dict]:
+        return await self._run(self.sync.list_jobs, offset, limit, fields, max_chars)
+
+    async def list_resumes(self, offset: int = 0, limit: Optional[int] = None, fields: str = "full",
+                           max_chars: int = 200) -> List[Dict]:
+        return await self._run(self.sync.list_resumes, offset, limit, fields, max_chars)
+
+    async def _iter_documents(self, collection, offset: int = 0, limit: Optional[int] = None, fields: str = "full",
+                              max_chars: int = 200, page_size: Optional[int] = None):
+        """Async version of VectorDBManager._iter_documents, reading each page on the Chroma threads."""
+        page_size = max(page_size or LIST_PAGE_SIZE, 1)
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            page = await self._run(self.sync._get_page, collection, offset, size, fields, max_chars)
+            for item in page:
+                yield item
+            if len(page) < size:
+                return
+            offset += len(page)
+            if remaining is not None:
+                remaining -= len(page)
+
+    def iter_jobs(self, offset: int = 0, limit: Optional[int] = None, fields: str = "full",
+                  max_chars: int = 200, page_size: Optional[int] = None):
+        return self._iter_documents(self.sync.jobs_collection, offset, limit, fields, max_chars, page_size)
+
+    def iter_resumes(self, offset: int = 0, limit: Optional[int] = None, fields: str = "full",
+                     max_chars: int = 200, page_size: Optional[int] = None):
+        return self._iter_documents(self.sync.resumes_collection, offset, limit, fields, max_chars, page_size)
+
+    async def search_similar_jobs(self, query_text: str, n_results: int = 5, aggregate: str = "max",
+                                  top_k: int = 3, where: Optional[Dict[str, Any]] = None,
+                                  mode: str = "vector") -> List[Dict]:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+        query_embedding = None if mode == "lexical" else await self._generate_embedding(query_text)
+        return await self._run(self.sync._search, self.sync.jobs_collection, query_text, query_embedding,
+                               n_results, aggregate, top_k, where, mode)
+
+    async def search_similar_resumes(self, query_text: str, n_results: int = 5, aggregate: str = "max",
+                                     top_k: int = 3, where: Optional[Dict[str, Any]] = None,
+                                     mode: str = "vector") -> List[Dict]:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+        query_embedding = None if mode == "lexical" else await self._generate_embedding(query_text)
+        return await self._run(self.sync._search, self.sync.resumes_collection, query_text, query_embedding,
+                               n_results, aggregate, top_k, where, mode)
+
+    async def backfill_chunks(self, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """Async version of VectorDBManager.backfill_chunks."""
+        batch_size = max(batch_size or EMBEDDING_BATCH_SIZE, 1)
+        done = {}
+        for collection in (self.sync.jobs_collection, self.sync.resumes_collection):
+            done[collection.name] = 0
+            ids = await self._run(self.sync._document_ids, collection)
+            for start in range(0, len(ids), batch_size):
+                missing = await self._run(self.sync._missing_chunks, collection, ids[start:start + batch_size])
+                if missing:
+                    embedded = await self._embed_documents([item[1] for item in missing])
+                    async with self._write_lock:
+                        await self._run(self.sync._store_batch, collection, missing, list(range(len(missing))), embedded)
+                    done[collection.name] += len(missing)
+        return done
+
+    async def match_jobs_to_resumes(self, job_ids: Optional[List[str]] = None,
+                                    resume_ids: Optional[List[str]] = None, top_k: int = 10) -> Dict:
+        return await self._run(self.sync.match_jobs_to_resumes, job_ids, resume_ids, top_k)
+
+    async def match_resumes_to_jobs(self, resume_ids: Optional[List[str]] = None,
+                                    job_ids: Optional[List[str]] = None, top_k: int = 10) -> Dict:
+        return await self._run(self.sync.match_resumes_to_jobs, resume_ids, job_ids, top_k)
+
+    async def aclose(self) -> None:
+        """Close the HTTP connection pool and stop the Chroma threads."""
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            await close()
+        self._executor.shutdown(wait=False)
+
+
+class _NoSyncClient:
+    """Stands in for the blocking client of the VectorDBManager wrapped by AsyncVectorDBManager."""
 
+    @property
+    def embeddings(self):
+        raise RuntimeError("AsyncVectorDBManager generates embeddings with its async client")
@@ -1,49 +1,194 @@
 from moviepy.editor import VideoFileClip
+from imageio_ffmpeg import get_ffmpeg_exe
+import math
+import numpy as np
 import os
+import struct
+import subprocess
+import threading
+import uuid
+from pathlib import Path
 from PIL import Image
-import tempfile
 
-def extract_frames_from_video(video_path, fps=None):
+TEMP_IMAGES_DIR = os.path.join(Path(__file__).parent , "temp_images")
+
+
+def count_frames(duration, fps):
+    """Number of frames moviepy yields for a clip: t = 0, 1/fps, 2/fps, ... < duration."""
+    return int(math.ceil(round(duration * fps, 6)))
+
+
+class VideoFrames:
+    def __init__(self, video_path, fps=None):
+        """
+        Lazily decoded frames of a video with a known frame count.
+
+        Frames go straight from the decoder to the caller as numpy arrays, so only
+        the frame being processed is held in memory and nothing touches the disk.
+
+        Args:
+            video_path (str): Path to the video file
+            fps (float, optional): Frames per second to extract. If None, uses video's native fps
+        """
+        self.video = VideoFileClip(video_path, audio=False)
+        # Use video's native fps if not specified
+        self.fps = fps or self.video.fps
+
+    def __len__(self):
+        return count_frames(self.video.duration, self.fps)
+
+    def __iter__(self):
+        try:
+            for frame in self.video.iter_frames(fps=self.fps, dtype="uint8"):
+                yield frame
+        finally:
+            # Close video to free resources, also when the consumer stops early
+            self.close()
+
+    def close(self):
+        self.video.close()
+
+
+def iter_frames(video_path, fps=None):
+    """
+    Decode a video lazily, yielding one RGB frame at a time.
+
+    Args:
+        video_path (str): Path to the video file
+        fps (float, optional): Frames per second to extract. If None, uses video's native fps
+
+    Returns:
+        VideoFrames: Iterable of (height, width, 3) uint8 RGB frames that also supports len()
+    """
+    return VideoFrames(video_path, fps=fps)
+
+
+def is_streamable(read_at):
+    """
+    Whether a video can be decoded front to back from a pipe.
+
+    MP4/MOV files need their 'moov' index before the 'mdat' payload to be
+    decoded without seeking; other containers are assumed to stream.
+
+    Args:
+        read_at (Callable): read_at(offset, size) -> bytes, may block until the bytes exist
+    """
+    offset = 0
+    first = True
+    while True:
+        header = read_at(offset, 16)
+        if len(header) < 8:
+            return True
+        size, box = struct.unpack(">I4s", header[:8])
+        if first and box != b"ftyp":
+            return True
+        first = False
+        if box == b"moov":
+            return True
+        if box == b"mdat" or size == 0:
+            return False
+        if size == 1:
+            if len(header) < 16:
+                return False
+            size = struct.unpack(">Q", header[8:16])[0]
+        if size < 8:
+            return False
+        offset += size
+
+
+def iter_frames_from_bytes(chunks, fps):
+    """
+    Decode a video from an iterable of byte chunks while they are still arriving.
+
+    The bytes are piped into ffmpeg, which emits raw PPM frames, so decoding
+    can start before the whole file exists. Check `is_streamable` first for
+    MP4 files.
+
+    Args:
+        chunks (iterable): Video bytes in order, e.g. `ProgressiveDownload.iter_bytes()`
+        fps (float): Frames per second to extract
+
+    Yields:
+        numpy.ndarray: (height, width, 3) uint8 RGB frame
+    """
+    process = subprocess.Popen(
+        [get_ffmpeg_exe(), "-loglevel", "error", "-i", "pipe:0",
+         "-vf", f"fps={fps}", "-f", "image2pipe", "-vcodec", "ppm", "pipe:1"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    feed_error = []
+    stderr = []
+
+    def feed():
+        try:
+            for chunk in chunks:
+                process.stdin.write(chunk)
+        except BrokenPipeError:
+            pass
+        except Exception as e:
+            feed_error.append(e)
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    drainer = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+    feeder.start()
+    drainer.start()
+    completed = False
+    try:
+        while True:
+            # ffmpeg writes "P6\n<width> <height>\n255\n" before every frame
+            magic = process.stdout.readline()
+            if not magic:
+                break
+            width, height = map(int, process.stdout.readline().split())
+            process.stdout.readline()
+            data = process.stdout.read(width * height * 3)
+            if len(data) < width * height * 3:
+                break
+            yield np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+        completed = True
+    finally:
+        if not completed and process.poll() is None:
+            # The consumer stopped early
+            process.kill()
+        process.wait()
+        drainer.join()
+    feeder.join()
+    if feed_error:
+        raise IOError(f"Video stream failed: {feed_error[0]}")
+    if process.returncode != 0:
+        message = stderr[0].decode(errors="replace").strip() if stderr and stderr[0] else ""
+        raise IOError(f"ffmpeg exited with {process.returncode}: {message}")
+
+
+def extract_frames_from_video(video_path, fps=None, output_dir=None):
     """
     Extract frames from a video file and save them as images.
-    
+
+    Prefer `iter_frames` unless the frames really have to be on disk.
+
     Args:
         video_path (str): Path to the video file
-        output_dir (str, optional): Directory to save the frames. If None, creates a temp directory
         fps (float, optional): Frames per second to extract. If None, uses video's native fps
-        
+        output_dir (str, optional): Directory to save the frames. If None, a new
+            directory unique to this call is created under temp_images
+
     Returns:
         list: List of paths to the extracted frame images
     """
-    # Create temporary directory if output_dir is not specified
-   
-    output_dir = r"D:\Python\python_projects_docker\recruitment_project\temp_images"
+    # A directory per call so concurrent requests never overwrite each other's frames
+    if output_dir is None:
+        output_dir = os.path.join(TEMP_IMAGES_DIR, str(uuid.uuid4()))
     os.makedirs(output_dir, exist_ok=True)
-    
-    # Load the video
-    video = VideoFileClip(video_path)
-    
-    # Use video's native fps if not specified
-    if fps is None:
-        fps = video.fps
-    
+
     frame_paths = []
-    
-    # Extract frames
-    for i, frame in enumerate(video.iter_frames(fps=fps)):
-        # Convert frame to PIL Image
-        pil_image = Image.fromarray(frame)
-        
-        # Generate output path for the frame
+    for i, frame in enumerate(iter_frames(video_path, fps=fps)):
         frame_path = os.path.join(output_dir, f"frame_{i:04d}.jpg")
-        
-        # Save the frame
-        pil_image.save(frame_path, quality=95)
-        
-        # Add path to list
+        Image.fromarray(frame).save(frame_path, quality=95)
         frame_paths.append(frame_path)
-    
-    # Close video to free resources
-    video.close()
-    
-    return frame_paths
\ No newline at end of file
+
+    return frame_paths